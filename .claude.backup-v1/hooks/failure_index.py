@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Index der beim TDD RED fehlgeschlagenen Tests.
+
+Eine sortierte Textdatei mit einer Test-ID ("Klasse.testMethode") pro
+Zeile neben workflow_state.json. Beim Laden werden die IDs interniert, so
+dass der GREEN-Abgleich nur Pointer-Vergleiche in einem frozenset macht.
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, Optional
+
+INDEX_FILE = Path(__file__).parent.parent / "tdd_failures.idx"
+
+
+def save(test_ids: Iterable[str]) -> int:
+    """Schreibt den Index atomar. Returns: Anzahl der Tests."""
+    ids = sorted(set(test_ids))
+    tmp = INDEX_FILE.with_suffix(".idx.tmp")
+    with open(tmp, "w") as f:
+        f.writelines(f"{test_id}\n" for test_id in ids)
+    os.replace(tmp, INDEX_FILE)
+    return len(ids)
+
+
+def load() -> Optional[frozenset]:
+    """Returns: frozenset der Test-IDs oder None, wenn kein Index existiert."""
+    try:
+        with open(INDEX_FILE, "r") as f:
+            return frozenset(sys.intern(line.rstrip("\n")) for line in f if line.strip())
+    except FileNotFoundError:
+        return None
+
+
+def clear() -> None:
+    try:
+        INDEX_FILE.unlink()
+    except FileNotFoundError:
+        pass
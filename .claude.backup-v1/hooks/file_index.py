@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Vorberechneter Datei-Index des Projekts für die Pfad-Klassifizierung.
+
+file_index.idx ist eine sortierte Textdatei:
+
+  #wfidx1 <regel-fingerprint> <quellen-stempel> <immer-erlaubte-klassen>
+  LeanHealthTimerTests/TwoPhaseTimerTests.swift<TAB>test
+  Services/GongPlayer.swift<TAB>protected
+  ...
+
+Das Gate sucht per mmap + Binärsuche, statt Regexe über den Pfad laufen
+zu lassen. Ändern sich die Pfad-Regeln in settings.json, passt der
+Fingerprint nicht mehr und der Index wird ignoriert, bis er neu gebaut ist.
+Neue Dateien, die noch nicht im Index stehen, klassifiziert das Gate wie
+bisher über die Regeln.
+
+Stempel (mtime/Größe der Regel- und Policy-Quellen) und die Klassen, die
+die Policy in keiner Phase blockiert, nutzt gate_fast.py: Es erlaubt
+solche Dateien, ohne workflow_gate überhaupt zu laden. Kopfzeile und
+Binärsuche liegen deshalb dort (importfrei).
+
+Aktualisierung: file_index.dirs merkt sich mtime und Unterverzeichnisse
+jedes Verzeichnisses; refresh() liest nur Verzeichnisse neu ein, deren
+mtime sich geändert hat (Datei angelegt/gelöscht/umbenannt).
+
+Aufruf:
+  python3 file_index.py refresh    # inkrementell (baut beim ersten Mal komplett)
+  python3 file_index.py rebuild    # alles neu
+  python3 file_index.py lookup <pfad>
+"""
+
+import json
+import mmap
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+from gate_fast import INDEX_MAGIC, bisect_lines, parse_header, source_stamp
+
+CLAUDE_DIR = Path(__file__).parent.parent
+PROJECT_DIR = CLAUDE_DIR.parent
+INDEX_FILE = CLAUDE_DIR / "file_index.idx"
+DIRS_FILE = CLAUDE_DIR / "file_index.dirs"
+
+# Versteckte Verzeichnisse (.git, .claude, ...) und Build-Artefakte
+SKIP_DIRS = {"DerivedData", "build", ".build", "node_modules", "__pycache__", "xcuserdata"}
+
+
+def lookup(rel_path: str, fingerprint: str) -> Optional[str]:
+    """Klasse einer Datei aus dem Index, None bei Miss oder veraltetem Index."""
+    try:
+        with open(INDEX_FILE, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                header = parse_header(buf)
+                if header is None or header[0][0].decode("ascii", errors="replace") != fingerprint:
+                    return None
+                found = bisect_lines(buf, header[1], rel_path.encode("utf-8", errors="surrogateescape"))
+    except (OSError, ValueError):
+        return None
+    return found.decode("utf-8") if found is not None else None
+
+
+def _load_dirs() -> dict:
+    try:
+        with open(DIRS_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _load_entries() -> dict:
+    """{relpath: klasse} aus dem bestehenden Index (Fingerprint egal)."""
+    entries = {}
+    try:
+        with open(INDEX_FILE, "rb") as f:
+            lines = f.read().split(b"\n")
+    except OSError:
+        return entries
+    for line in lines[1:]:
+        path, sep, path_class = line.partition(b"\t")
+        if sep:
+            entries[path.decode("utf-8", errors="surrogateescape")] = path_class.decode("utf-8")
+    return entries
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def refresh(full: bool = False) -> dict:
+    """
+    Aktualisiert den Index. Unveränderte Verzeichnisse (gleiche mtime)
+    werden nicht gelistet; bei geänderten Regeln werden nur die Klassen neu
+    berechnet.
+
+    Returns: {"files", "dirs_scanned", "dirs_total"}
+    """
+    import workflow_gate
+
+    fingerprint = workflow_gate.rules_fingerprint()
+    old_dirs = {} if full else _load_dirs()
+    old_entries = {} if full else _load_entries()
+
+    # Dateien der alten Einträge nach Verzeichnis gruppieren
+    files_by_dir = {}
+    for rel_path in old_entries:
+        files_by_dir.setdefault(os.path.dirname(rel_path), []).append(rel_path)
+
+    new_dirs = {}
+    files = []
+    scanned = 0
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        abs_dir = os.path.join(PROJECT_DIR, rel_dir) if rel_dir else str(PROJECT_DIR)
+        try:
+            mtime = os.stat(abs_dir).st_mtime_ns
+        except OSError:
+            continue
+
+        cached = old_dirs.get(rel_dir)
+        if cached and cached[0] == mtime:
+            subdirs = cached[1]
+            files.extend(files_by_dir.get(rel_dir, ()))
+        else:
+            scanned += 1
+            subdirs = []
+            try:
+                with os.scandir(abs_dir) as it:
+                    for entry in it:
+                        if "\t" in entry.name or "\n" in entry.name:
+                            continue
+                        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name.startswith(".") or entry.name in SKIP_DIRS:
+                                continue
+                            subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append(rel)
+            except OSError:
+                continue
+
+        new_dirs[rel_dir] = [mtime, subdirs]
+        pending.extend(f"{rel_dir}/{name}" if rel_dir else name for name in subdirs)
+
+    lines = sorted(
+        f"{rel}\t{workflow_gate.match_path_class(rel)}".encode("utf-8", errors="surrogateescape")
+        for rel in files
+    )
+    static = ",".join(workflow_gate.static_allow_classes()) or "-"
+    header = f"{fingerprint} {source_stamp()} {static}".encode("ascii")
+    _write_atomic(INDEX_FILE, INDEX_MAGIC + header + b"\n" + b"\n".join(lines) + b"\n")
+    _write_atomic(DIRS_FILE, json.dumps(new_dirs, separators=(",", ":")).encode("utf-8"))
+    return {"files": len(files), "dirs_scanned": scanned, "dirs_total": len(new_dirs)}
+
+
+def main():
+    commands = ("refresh", "rebuild", "lookup")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("Usage: file_index.py <refresh|rebuild|lookup <pfad>>")
+        sys.exit(1)
+
+    if sys.argv[1] == "lookup":
+        import workflow_gate
+
+        if len(sys.argv) < 3:
+            print("❌ lookup benötigt einen Pfad")
+            sys.exit(1)
+        rel_path = workflow_gate.relative_path(sys.argv[2])
+        found = lookup(rel_path, workflow_gate.rules_fingerprint())
+        print(f"{rel_path}: {found or 'nicht im Index'} (Regeln: {workflow_gate.match_path_class(rel_path)})")
+        return
+
+    stats = refresh(full=sys.argv[1] == "rebuild")
+    print(f"✓ Datei-Index: {stats['files']} Dateien, {stats['dirs_scanned']}/{stats['dirs_total']} Verzeichnisse gelesen")
+
+
+if __name__ == "__main__":
+    main()
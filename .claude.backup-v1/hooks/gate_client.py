@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Gate-Client - dünner PreToolUse-Hook vor gate_server.py.
+
+Leitet tool_name/file_path des Hook-JSON an den laufenden Gate-Server
+weiter und gibt dessen Exit-Code und stderr-Banner unverändert zurück. Läuft kein Server, wird
+workflow_gate in-process ausgeführt (gleiches Verhalten wie bisher).
+
+Exit Codes:
+  0 = Erlaubt
+  2 = Blockiert (Tool wird nicht ausgeführt)
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+
+import telemetry
+from gate_input import GATED_TOOLS, read_hook_target
+
+SOCKET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gate.sock")
+TIMEOUT_SECONDS = 5
+
+
+def ask_server(raw: bytes):
+    """Fragt den Gate-Server. Returns: (exit_code, meldung) oder None."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(TIMEOUT_SECONDS)
+            sock.connect(SOCKET_PATH)
+            sock.sendall(raw)
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError:
+        return None
+
+    head, sep, message = b"".join(chunks).partition(b"\n")
+    if not sep or not head.isdigit():
+        return None
+    return int(head), message.decode("utf-8", errors="replace")
+
+
+def main(stream=None):
+    # stream: von gate_fast.py mit dem schon gelesenen Anfang von stdin
+    # Telemetrie: CPU-Zeit bis hier ≈ Interpreter-Start + Imports
+    timings = {"startup": time.process_time()}
+    started = time.perf_counter()
+
+    # Nur tool_name/file_path lesen - der content eines Write bleibt im Pipe
+    try:
+        tool_name, file_path = read_hook_target(stream or sys.stdin)
+    except ValueError:
+        finish(timings, started, started, "error", 0, "")
+    parsed = time.perf_counter()
+    if tool_name not in GATED_TOOLS or not file_path:
+        finish(timings, started, parsed, "allow", 0, "")
+
+    request = {"tool_name": tool_name, "tool_input": {"file_path": file_path}}
+    result = ask_server(json.dumps(request).encode("utf-8"))
+    if result is None:
+        # Kein Server erreichbar → in-process wie bisher
+        import workflow_gate
+        result = workflow_gate.check(request)
+
+    exit_code, error_msg = result
+    finish(timings, started, parsed, "block" if exit_code else "allow", exit_code, error_msg)
+
+
+def finish(timings: dict, started: float, parsed: float, verdict: str, exit_code: int, error_msg: str):
+    """Meldung ausgeben, Telemetrie schreiben, beenden."""
+    if error_msg:
+        print(error_msg, file=sys.stderr)
+    done = time.perf_counter()
+    timings.update(parse=parsed - started, decide=done - parsed, total=timings["startup"] + done - started)
+    telemetry.record("client", verdict, timings)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
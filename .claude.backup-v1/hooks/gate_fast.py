@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Schnellstart-Gate für den PreToolUse-Hook (Einstieg: gate_hook.py).
+
+  python3 -S -E "$CLAUDE_PROJECT_DIR/.claude/hooks/gate_hook.py"
+
+-S/-E: kein site-Import, keine PYTHON*-Variablen. Beim Modul-Import wird
+nichts geladen, was der Interpreter nicht ohnehin schon hat (sys, time,
+posix - os allein kostet ohne site ~2 ms). Die billigsten Prüfungen
+kommen zuerst:
+
+  1. tool_name aus dem ersten Chunk - nicht Edit/Write → exit 0
+  2. file_path + Datei-Index (file_index.idx): eine Klasse, die die Policy
+     in jeder Phase erlaubt (z.B. DOCS/*.md) → exit 0
+
+Beides nur, wenn es ohne JSON-Parser eindeutig lesbar ist: Verlässlich
+ist, was vor "tool_input" steht (das Einzige, was der Agent bestimmt),
+und dessen erster Key. Alles andere geht samt schon gelesenem Anfang an
+gate_client.main() - Gate-Server oder workflow_gate in-process. Der
+Bytecode dieses und aller anderen Hook-Module liegt vorkompiliert in
+__pycache__ (python3 gate_fast.py --precompile, wird beim Wechsel nach
+implementing aufgefrischt).
+
+Der Index-Kopf trägt einen Stempel (mtime/Größe von settings.json,
+workflow_gate.py, gate_policy.py) und die immer erlaubten Klassen; passt
+der Stempel nicht, entscheidet das volle Gate.
+
+Exit Codes:
+  0 = Erlaubt
+  2 = Blockiert (Tool wird nicht ausgeführt)
+"""
+
+import posix
+import sys
+import time
+
+HOOKS_DIR = __file__.rpartition("/")[0] or "."
+if not HOOKS_DIR.startswith("/"):
+    HOOKS_DIR = f"{posix.getcwd()}/{HOOKS_DIR}"
+CHUNK_SIZE = 64 * 1024
+GATED_TOOLS = ("Edit", "Write")
+
+INDEX_MAGIC = b"#wfidx1 "
+STAMP_SOURCES = ("../settings.json", "workflow_gate.py", "gate_policy.py")
+_WHITESPACE = b" \t\r\n"
+
+
+def _skip_ws(buf: bytes, pos: int) -> int:
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _key(buf: bytes, key: bytes) -> int:
+    """Position des ersten Vorkommens, -1 = fehlt, -2 = mehrdeutig (escaped)."""
+    pos = buf.find(key)
+    if pos > 0 and buf[pos - 1] == 0x5C:  # '\\' → steckt in einem String
+        return -2
+    return pos
+
+
+def _value(buf: bytes, pos: int, tokens: tuple):
+    """String nach einer Folge fester Tokens; None, wenn nicht trivial lesbar."""
+    for token in tokens:
+        pos = _skip_ws(buf, pos)
+        if not buf.startswith(token, pos):
+            return None
+        pos += len(token)
+    pos = _skip_ws(buf, pos)
+    if buf[pos:pos + 1] != b'"':
+        return None
+    end = buf.find(b'"', pos + 1)
+    if end == -1 or b"\\" in buf[pos + 1:end]:
+        return None
+    try:
+        return buf[pos + 1:end].decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def fast_target(head: bytes) -> tuple:
+    """(tool_name, file_path) - jeweils None, wenn der Fast-Path es nicht sicher weiß."""
+    name_pos = _key(head, b'"tool_name"')
+    input_pos = _key(head, b'"tool_input"')
+    if name_pos < 0 or input_pos == -2 or 0 <= input_pos < name_pos:
+        return None, None
+    tool_name = _value(head, name_pos + len(b'"tool_name"'), (b":",))
+    if tool_name is None or input_pos < 0:
+        return tool_name, None
+    return tool_name, _value(head, input_pos + len(b'"tool_input"'), (b":", b"{", b'"file_path"', b":"))
+
+
+def source_stamp() -> str:
+    """mtime/Größe der Dateien, aus denen Index-Klassen und Policy stammen."""
+    parts = []
+    for name in STAMP_SOURCES:
+        try:
+            st = posix.stat(f"{HOOKS_DIR}/{name}")
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            parts.append("-")
+    return ",".join(parts)
+
+
+def parse_header(buf):
+    """Felder der Index-Kopfzeile und Offset der ersten Zeile, oder None."""
+    end = buf.find(b"\n")
+    if end == -1 or buf[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        return None
+    return buf[len(INDEX_MAGIC):end].split(b" "), end + 1
+
+
+def bisect_lines(buf, start: int, key: bytes):
+    """Binärsuche über sortierte Zeilen "pfad\\tklasse\\n" in buf[start:]; Klasse oder None."""
+    lo, hi = start, len(buf)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        # Auf den Anfang der Zeile zurückgehen, in der mid liegt
+        line_start = max(buf.rfind(b"\n", start, mid) + 1, start)
+        line_end = buf.find(b"\n", line_start)
+        if line_end == -1:
+            line_end = len(buf)
+        path, _, path_class = buf[line_start:line_end].partition(b"\t")
+        if path == key:
+            return path_class
+        if path < key:
+            lo = line_end + 1
+        else:
+            hi = line_start
+    return None
+
+
+def indexed_static_allow(file_path: str) -> bool:
+    """Steht die Datei im Index mit einer Klasse, die nie blockiert wird?"""
+    import mmap
+
+    claude_dir = HOOKS_DIR.rpartition("/")[0]
+    project_dir = claude_dir.rpartition("/")[0]
+    rel_path = file_path
+    if file_path.startswith(project_dir):
+        rel_path = file_path[len(project_dir):].lstrip("/")
+
+    try:
+        with open(f"{claude_dir}/file_index.idx", "rb") as f:
+            if posix.fstat(f.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                header = parse_header(buf)
+                if header is None or len(header[0]) < 3:
+                    return False
+                _, stamp, static = header[0][:3]
+                if stamp.decode("ascii", errors="replace") != source_stamp():
+                    return False
+                found = bisect_lines(buf, header[1], rel_path.encode("utf-8", errors="surrogateescape"))
+    except (OSError, ValueError):
+        return False
+    return found is not None and found in static.split(b",")
+
+
+class _Replay:
+    """Schon gelesener Anfang + Rest von stdin, für den normalen Scanner."""
+
+    def __init__(self, head: bytes, stream):
+        self.head = head
+        self.stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if self.head:
+            chunk, self.head = self.head, b""
+            return chunk
+        return self.stream.read(size)
+
+
+def precompile() -> int:
+    """Bytecode aller Hook-Module nach __pycache__ (nur veraltete werden neu übersetzt)."""
+    import compileall
+
+    return 0 if compileall.compile_dir(HOOKS_DIR, quiet=1, maxlevels=0) else 1
+
+
+def main():
+    if sys.argv[1:2] == ["--precompile"]:
+        sys.exit(precompile())
+
+    startup = time.process_time()
+    started = time.perf_counter()
+    stdin = sys.stdin.buffer
+    head = stdin.read(CHUNK_SIZE)
+    tool_name, file_path = fast_target(head)
+
+    if tool_name is not None and (tool_name not in GATED_TOOLS or file_path == ""):
+        allow(startup, started, started)
+    if file_path:
+        parsed = time.perf_counter()
+        if indexed_static_allow(file_path):
+            allow(startup, started, parsed)
+
+    import gate_client
+
+    gate_client.main(_Replay(head, stdin))
+
+
+def allow(startup: float, started: float, parsed: float) -> None:
+    """Fast-Path-Erlaubnis mit Telemetrie (Quelle "fast", kostet den os-Import)."""
+    if posix.environ.get(b"WORKFLOW_TELEMETRY", b"1") != b"0":
+        import telemetry
+
+        done = time.perf_counter()
+        telemetry.record("fast", "allow", {
+            "startup": startup,
+            "parse": parsed - started,
+            "classify": done - parsed,
+            "total": startup + done - started,
+        })
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+PreToolUse-Einstieg: python3 -S -E "$CLAUDE_PROJECT_DIR/.claude/hooks/gate_hook.py"
+
+Absichtlich fast leer - das aufgerufene Script übersetzt Python bei jedem
+Start neu (~3 ms für gate_fast.py), importierte Module kommen als
+Bytecode aus __pycache__. Logik und Exit Codes: siehe gate_fast.py.
+"""
+
+import gate_fast
+
+gate_fast.main()
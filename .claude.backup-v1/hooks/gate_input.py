@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Inkrementeller Scanner für Hook-Input (JSON auf stdin).
+
+Liest nur so viel vom Stream, bis tool_name und tool_input.file_path
+bekannt sind. Alle anderen Werte - vor allem das riesige "content" bei
+Write - werden übersprungen, ohne daraus Strings zu bauen. Speicher und
+Laufzeit hängen damit nicht von der Payload-Größe ab.
+"""
+
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+MAX_KEPT_STRING = 64 * 1024  # Längere Keys/Werte werden nur übersprungen
+
+GATED_TOOLS = ("Edit", "Write")
+
+# Stringinhalt bis (exklusive) zum schließenden Anführungszeichen
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+# Alles, was in Containern nicht strukturell ist
+_CONTAINER_FILLER = re.compile(rb'[^"{}\[\]]*')
+_WHITESPACE = b" \t\r\n"
+_SCALAR_END = b",}] \t\r\n"
+
+
+class _Scanner:
+    def __init__(self, stream, chunk_size: int = CHUNK_SIZE):
+        self.stream = getattr(stream, "buffer", stream)
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        """Hängt den nächsten Chunk an den ungelesenen Rest an."""
+        chunk = self.stream.read(self.chunk_size)
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> int:
+        while self.pos >= len(self.buf):
+            if not self._fill():
+                raise ValueError("Unerwartetes Ende des Hook-Inputs")
+        return self.buf[self.pos]
+
+    def _next_token(self) -> int:
+        """Überspringt Whitespace und liefert das nächste Zeichen (nicht verbraucht)."""
+        while True:
+            c = self._peek()
+            if c not in _WHITESPACE:
+                return c
+            self.pos += 1
+
+    def _expect(self, char: bytes):
+        if self._next_token() != char[0]:
+            raise ValueError(f"{char!r} erwartet")
+        self.pos += 1
+
+    def _string(self, keep: bool):
+        """Liest einen String ab dem öffnenden Anführungszeichen."""
+        self._expect(b'"')
+        kept = []
+        kept_size = 0
+        while True:
+            end = _STRING_BODY.match(self.buf, self.pos).end()
+            if keep and kept_size <= MAX_KEPT_STRING:
+                kept.append(self.buf[self.pos:end])
+                kept_size += end - self.pos
+            self.pos = end
+            if end < len(self.buf) and self.buf[end] == 0x22:  # '"'
+                self.pos += 1
+                break
+            # Chunk zu Ende (evtl. mitten in einer Escape-Sequenz) → nachladen
+            if not self._fill():
+                raise ValueError("Unterminierter String im Hook-Input")
+
+        if not keep or kept_size > MAX_KEPT_STRING:
+            return None
+        return json.loads(b'"' + b"".join(kept) + b'"')
+
+    def _skip_value(self):
+        c = self._next_token()
+        if c == 0x22:  # '"'
+            self._string(keep=False)
+        elif c in b"{[":
+            self._skip_container()
+        else:
+            # Zahl, true, false, null
+            while self._peek() not in _SCALAR_END:
+                self.pos += 1
+
+    def _skip_container(self):
+        depth = 0
+        while True:
+            self.pos = _CONTAINER_FILLER.match(self.buf, self.pos).end()
+            if self.pos >= len(self.buf):
+                if not self._fill():
+                    raise ValueError("Unterminierter Container im Hook-Input")
+                continue
+            c = self.buf[self.pos]
+            if c == 0x22:
+                self._string(keep=False)
+                continue
+            self.pos += 1
+            depth += 1 if c in b"{[" else -1
+            if depth == 0:
+                return
+
+    def _members(self):
+        """Iteriert über die Keys eines Objekts; der Wert muss vom Aufrufer gelesen werden."""
+        self._expect(b"{")
+        if self._next_token() == 0x7D:  # '}'
+            self.pos += 1
+            return
+        while True:
+            key = self._string(keep=True)
+            self._expect(b":")
+            yield key
+            c = self._next_token()
+            self.pos += 1
+            if c == 0x7D:
+                return
+            if c != 0x2C:  # ','
+                raise ValueError("',' oder '}' erwartet")
+
+    def scan(self) -> tuple[str, str]:
+        tool_name = None
+        file_path = None
+
+        for key in self._members():
+            if key == "tool_name" and self._next_token() == 0x22:
+                tool_name = self._string(keep=True) or ""
+                if tool_name not in GATED_TOOLS:
+                    return tool_name, ""
+            elif key == "tool_input" and self._next_token() == 0x7B:  # '{'
+                for input_key in self._members():
+                    if input_key == "file_path" and self._next_token() == 0x22:
+                        file_path = self._string(keep=True) or ""
+                        if tool_name is not None:
+                            return tool_name, file_path
+                    else:
+                        self._skip_value()
+            else:
+                self._skip_value()
+
+            if tool_name is not None and file_path is not None:
+                return tool_name, file_path
+
+        return tool_name or "", file_path or ""
+
+
+def read_hook_target(stream, chunk_size: int = CHUNK_SIZE) -> tuple[str, str]:
+    """
+    Extrahiert (tool_name, file_path) aus dem Hook-JSON.
+
+    Hört auf zu lesen, sobald beides bekannt ist oder das Tool nicht
+    Edit/Write ist. Raises ValueError bei ungültigem JSON.
+    """
+    return _Scanner(stream, chunk_size).scan()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Deklarative Gate-Policy.
+
+Statt fest verdrahteter if-Logik beschreibt eine Regeltabelle
+(settings.json: "workflowGate" → "policy"), was bei welcher Kombination aus
+Phase × Pfad-Klasse × TDD-Flags passiert:
+
+  {"phase": "implementing", "path": "protected", "tests_written": false,
+   "verdict": "block", "message": "tdd_missing"}
+
+Regeln werden von oben nach unten geprüft, die erste passende gewinnt.
+"phase" und "path" sind ein Name, eine Liste oder "*"; tests_written,
+tdd_proof und tests_cover (die RED-Tests decken die Datei ab, siehe
+test_map.py) sind optional. Passt keine Regel, gilt "default".
+
+compile_policy() rechnet die Tabelle einmal in ein flaches Dict
+(phase, klasse, tests_written, tdd_proof, tests_cover) → (verdict, message_id)
+aus. Klassen, die in jeder Kombination erlaubt sind, brauchen keinen State;
+tests_cover wird nur ermittelt, wenn es das Ergebnis ändern kann.
+"""
+
+from itertools import product
+from typing import Callable, Optional
+
+ALLOW = "allow"
+BLOCK = "block"
+ANY = "*"
+
+# Bisherige Gate-Logik + Abgleich RED-Tests ↔ bearbeitete Datei
+DEFAULT_POLICY = {
+    "default": ALLOW,
+    "rules": [
+        {"phase": "implementing", "path": "test", "verdict": ALLOW},
+        {"phase": "implementing", "path": "protected", "tests_written": False,
+         "verdict": BLOCK, "message": "tdd_missing"},
+        {"phase": "implementing", "path": "protected", "tdd_proof": False,
+         "verdict": BLOCK, "message": "tdd_no_proof"},
+        {"phase": "implementing", "path": "protected", "tests_cover": False,
+         "verdict": BLOCK, "message": "tdd_not_covered"},
+        {"phase": "implementing", "path": "protected", "verdict": ALLOW},
+        {"phase": ANY, "path": ["test", "protected"], "verdict": BLOCK, "message": "phase"},
+    ],
+}
+
+FLAGS = ("tests_written", "tdd_proof", "tests_cover")
+FLAG_VALUES = (False, True)
+
+
+def _names(value) -> Optional[set]:
+    """"*" → None (alles), sonst Menge der Namen."""
+    if value is None or value == ANY:
+        return None
+    if isinstance(value, str):
+        return {value}
+    return set(value)
+
+
+def _valid_rule(rule) -> bool:
+    return isinstance(rule, dict) and rule.get("verdict") in (ALLOW, BLOCK)
+
+
+class CompiledPolicy:
+    def __init__(self, table: dict, static_allow: frozenset, cover_matters: frozenset):
+        self.table = table
+        self.static_allow = static_allow
+        self.cover_matters = cover_matters
+
+    def evaluate(self, path_class: str, get_state: Callable[[], dict],
+                 tests_cover: Callable[[dict], bool] = lambda state: True
+                 ) -> tuple[str, Optional[str], Optional[str]]:
+        """
+        Returns: (verdict, message_id, phase) - phase ist None, wenn der
+        State gar nicht gebraucht wurde.
+        """
+        if path_class in self.static_allow:
+            return ALLOW, None, None
+
+        state = get_state()
+        phase = state.get("current_phase", "idle")
+        phase_key = phase if (phase, path_class) in self.table else ANY
+        flags = (bool(state.get("tests_written", False)), bool(state.get("tdd_proof", None)))
+        cover = True
+        if (phase_key, path_class, *flags) in self.cover_matters:
+            cover = bool(tests_cover(state))
+        return (*self.table[(phase_key, path_class)][(*flags, cover)], phase)
+
+
+def compile_policy(policy: dict, path_classes: list[str]) -> CompiledPolicy:
+    """Rechnet die Regeltabelle für alle Kombinationen einmal aus."""
+    rules = [rule for rule in policy.get("rules", []) if _valid_rule(rule)]
+    default = policy.get("default", ALLOW)
+    if default not in (ALLOW, BLOCK):
+        default = ALLOW
+
+    # Alle namentlich genannten Phasen + ANY für unbekannte Phasen
+    phases = {ANY}
+    for rule in rules:
+        phases |= _names(rule.get("phase")) or set()
+
+    # (phase, klasse) → {(tests_written, tdd_proof, tests_cover): (verdict, message_id)}
+    table = {}
+    for phase in phases:
+        for path_class in path_classes:
+            combos = table[(phase, path_class)] = {}
+            for flags in product(FLAG_VALUES, repeat=len(FLAGS)):
+                entry = (default, None)
+                for rule in rules:
+                    rule_phases = _names(rule.get("phase"))
+                    rule_paths = _names(rule.get("path"))
+                    if rule_phases is not None and phase not in rule_phases:
+                        continue
+                    if rule_paths is not None and path_class not in rule_paths:
+                        continue
+                    if any(rule.get(flag, value) != value for flag, value in zip(FLAGS, flags)):
+                        continue
+                    entry = (rule["verdict"], rule.get("message"))
+                    break
+                combos[flags] = entry
+
+    static_allow = frozenset(
+        path_class for path_class in path_classes
+        if all(verdict == ALLOW for (_, cls), combos in table.items() if cls == path_class
+               for verdict, _ in combos.values())
+    )
+    cover_matters = frozenset(
+        (phase, path_class, *flags)
+        for (phase, path_class), combos in table.items()
+        for flags in product(FLAG_VALUES, repeat=2)
+        if combos[(*flags, False)] != combos[(*flags, True)]
+    )
+    return CompiledPolicy(table, static_allow, cover_matters)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Gate-Server - hält das Workflow Gate dauerhaft im Speicher.
+
+Statt für jedes Edit/Write einen neuen Interpreter zu starten, beantwortet
+dieser Prozess die Anfragen von gate_client.py über einen Unix-Socket.
+State und kompilierte Pattern-Tabellen bleiben geladen; beide werden nur
+neu gelesen, wenn sich workflow_state.json (bzw. die SQLite-Datenbank)
+oder settings.json ändern.
+
+Aufruf:
+  python3 gate_server.py start     # Im Vordergrund starten (z.B. mit &)
+  python3 gate_server.py stop      # Laufenden Server beenden
+  python3 gate_server.py status    # Läuft der Server?
+
+Protokoll:
+  Client → Server: Hook-JSON, danach Schreibseite schließen
+  Server → Client: "<exit_code>\\n<stderr-meldung>"
+"""
+
+import os
+import signal
+import socketserver
+import sys
+import threading
+from pathlib import Path
+
+import state_store
+import workflow_gate
+
+SCRIPT_DIR = Path(__file__).parent
+SOCKET_PATH = SCRIPT_DIR.parent / "gate.sock"
+PID_FILE = SCRIPT_DIR.parent / "gate.pid"
+
+
+class StateCache:
+    """Cached den Workflow-State, bis sich der Change-Token des Backends ändert."""
+
+    def __init__(self, state_file: Path):
+        self.state_file = state_file
+        self.key = None
+        self.state = None
+        self.lock = threading.Lock()
+
+    def get(self) -> dict:
+        key = state_store.change_token(self.state_file)
+
+        with self.lock:
+            if self.state is None or key != self.key:
+                self.state = workflow_gate.load_state()
+                self.key = key
+            return self.state
+
+
+class GateHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        raw = self.rfile.read()
+        try:
+            workflow_gate.reload_path_rules()
+            exit_code, message = workflow_gate.run(
+                raw.decode("utf-8", errors="replace"), self.server.state_cache.get
+            )
+        except Exception as e:  # Server darf an einem Request nicht sterben
+            exit_code, message = 0, f"gate_server: interner Fehler ({e}) - erlaubt"
+        self.wfile.write(f"{exit_code}\n{message}".encode("utf-8"))
+
+
+class GateServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def read_pid() -> int:
+    try:
+        pid = int(PID_FILE.read_text().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return 0
+
+
+def start():
+    if read_pid():
+        print(f"Gate-Server läuft bereits (PID {read_pid()})")
+        sys.exit(1)
+
+    # Verwaisten Socket eines abgestürzten Servers entfernen
+    if SOCKET_PATH.exists():
+        SOCKET_PATH.unlink()
+
+    server = GateServer(str(SOCKET_PATH), GateHandler)
+    server.state_cache = StateCache(workflow_gate.STATE_FILE)
+    PID_FILE.write_text(str(os.getpid()))
+
+    def terminate(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, terminate)
+    signal.signal(signal.SIGINT, terminate)
+
+    print(f"✓ Gate-Server lauscht auf {SOCKET_PATH}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        for path in (SOCKET_PATH, PID_FILE):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def stop():
+    pid = read_pid()
+    if not pid:
+        print("Gate-Server läuft nicht")
+        return
+    os.kill(pid, signal.SIGTERM)
+    print(f"✓ Gate-Server beendet (PID {pid})")
+
+
+def status():
+    pid = read_pid()
+    if pid:
+        print(f"Gate-Server läuft (PID {pid}, Socket {SOCKET_PATH})")
+    else:
+        print("Gate-Server läuft nicht - gate_client.py prüft in-process")
+
+
+def main():
+    commands = {"start": start, "stop": stop, "status": status}
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("Usage: gate_server.py <start|stop|status>")
+        sys.exit(1)
+    commands[sys.argv[1]]()
+
+
+if __name__ == "__main__":
+    main()
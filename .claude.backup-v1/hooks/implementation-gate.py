@@ -2,29 +2,16 @@
 """
 Wrapper - leitet an workflow_gate.py weiter.
 Existiert nur für Rückwärtskompatibilität mit gecachten Sessions.
+
+Das Gate läuft im selben Interpreter: stdin/stdout/stderr gehen direkt
+durch, Exit-Codes bleiben identisch (0 = erlaubt, 2 = blockiert).
 """
-import subprocess
 import sys
 from pathlib import Path
 
-# stdin komplett lesen
-stdin_data = sys.stdin.read()
-
-# workflow_gate.py aufrufen
-new_hook = Path(__file__).parent / "workflow_gate.py"
-result = subprocess.run(
-    ["python3", str(new_hook)],
-    input=stdin_data,
-    text=True,
-    capture_output=True
-)
-
-# stderr ausgeben (Fehlermeldungen)
-if result.stderr:
-    print(result.stderr, file=sys.stderr)
+# workflow_gate.py liegt neben diesem Wrapper
+sys.path.insert(0, str(Path(__file__).parent))
 
-# stdout ausgeben falls vorhanden
-if result.stdout:
-    print(result.stdout)
+import workflow_gate
 
-sys.exit(result.returncode)
+workflow_gate.main()
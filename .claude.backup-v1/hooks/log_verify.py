@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Streaming-Prüfung von xcodebuild-Logs auf echte Test-Failures.
+
+Gleiche Regeln wie früher verify_test_failure() in update_state.py, aber:
+  - der Log wird blockweise gelesen statt komplett mit read_text()
+  - ein billiger Literal-Vorfilter pro Block, danach EIN kombiniertes
+    Pattern nur für die Kandidaten-Zeilen statt zehn Scans über den Text
+  - Abbruch, sobald das Ergebnis feststeht (erste echte Test-Failure)
+  - .gz/.xz-Logs werden direkt gelesen
+
+Alle Muster sind zeilenlokal ("." matcht kein "\\n"), deshalb liefert die
+Suche über Blöcke aus ganzen Zeilen exakt dasselbe wie über den ganzen Text.
+"""
+
+import gzip
+import lzma
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+# Muster für echte Test-Failures (nicht nur Compile-Errors!)
+FAILURE_PATTERNS = [
+    r"Test Case .* failed",
+    r"XCTAssert.*failed",
+    r"expected .* but got",
+    r"Executed \d+ tests?, with \d+ failure",
+    r"\*\* TEST FAILED \*\*",
+    r"FAILED.*\d+ test",
+]
+
+# Muster für Compile-Errors (das ist KEIN echter TDD RED!)
+COMPILE_ERROR_PATTERNS = [
+    r"error:.*has no member",
+    r"error:.*cannot find .* in scope",
+    r"error:.*undeclared type",
+    r"Build Failed",
+]
+
+BLOCK_CHARS = 1024 * 1024
+# So viele entscheidende Zeilen landen als Auszug im Proof-Store
+EXCERPT_LINES = 20
+
+# Jede Fundstelle eines Musters enthält (case-insensitiv) eines dieser
+# Literale. Nur Zeilen mit einem Treffer gehen durch die Regex.
+PREFILTER_NEEDLES = ["fail", "error:", "but got"]
+# re.IGNORECASE lässt "i" auch auf "İ"/"ı" passen, str.lower() nicht
+_FOLD = {"\u0130": "i", "\u0131": "i"}
+
+
+def _combine(patterns: list[str]):
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+
+_FAILURE_RE = _combine(FAILURE_PATTERNS)
+_COMPILE_ERROR_RE = _combine(COMPILE_ERROR_PATTERNS)
+_ANY_RE = _combine(FAILURE_PATTERNS + COMPILE_ERROR_PATTERNS)
+# Zusammenfassungen mit mindestens einer Failure (für GREEN ohne RED-Index)
+_SUMMARY_FAILURE_RE = re.compile(
+    r"Executed \d+ tests?, with [1-9]\d* failures?|\*\* TEST FAILED \*\*", re.IGNORECASE
+)
+
+
+# Ergebniszeilen beider xcodebuild-Formate:
+#   Test Case '-[LeanHealthTimerTests.TwoPhaseTimerTests testX]' failed (0.1 seconds).
+#   Test case 'TwoPhaseTimerTests.testX()' passed on 'Clone 1 of iPhone ...'
+_TEST_RESULT_RE = re.compile(
+    r"Test [Cc]ase '(?:-\[(?:[\w.]+\.)?(?P<cls>\w+) (?P<method>\w+)\]"
+    r"|(?:[\w.]+\.)?(?P<cls2>\w+)\.(?P<method2>\w+)\(\))' (?P<status>passed|failed)"
+)
+
+
+def normalize_test_id(raw: str) -> str:
+    """Einheitliche Test-ID "Klasse.testMethode" (ohne Modul und "()")."""
+    parts = raw.replace("()", "").replace("/", ".").replace(" ", ".").strip("-[]").split(".")
+    return sys.intern(".".join(parts[-2:]))
+
+
+def _result_id(match) -> str:
+    cls = match["cls"] or match["cls2"]
+    method = match["method"] or match["method2"]
+    return sys.intern(f"{cls}.{method}")
+
+
+def candidate_lines(text: str, needles: list[str]):
+    """
+    Liefert die Zeilen von text, die (case-insensitiv) eines der Literale
+    enthalten, in Textreihenfolge. Der Rest des Blocks wird nur mit
+    str.find überflogen.
+    """
+    folded = text
+    if not text.isascii():
+        for char, replacement in _FOLD.items():
+            if char in folded:
+                folded = folded.replace(char, replacement)
+    folded = folded.lower()
+    if len(folded) != len(text):
+        # Sicherheitsnetz: ohne deckungsgleiche Positionen den ganzen Text prüfen
+        yield text
+        return
+
+    # Zeilen-Spannen aller Literale sammeln und in Textreihenfolge liefern
+    spans = set()
+    for needle in needles:
+        pos = folded.find(needle)
+        while pos != -1:
+            start = text.rfind("\n", 0, pos) + 1
+            end = text.find("\n", pos)
+            if end == -1:
+                end = len(text)
+            spans.add((start, end))
+            pos = folded.find(needle, end)
+
+    for start, end in sorted(spans):
+        yield text[start:end]
+
+
+class LogVerifier:
+    """Inkrementeller Verifier - wird mit Text aus ganzen Zeilen gefüttert."""
+
+    def __init__(self, collect_failures: bool = False):
+        self.has_test_failure = False
+        self.has_compile_error = False
+        # Mit collect_failures wird bis zum Ende gelesen, um ALLE
+        # fehlgeschlagenen Tests für den Failure-Index zu sammeln
+        self.collect_failures = collect_failures
+        self.failing_tests = set()
+        self.excerpt = []
+
+    @property
+    def done(self) -> bool:
+        """Eine echte Test-Failure entscheidet endgültig."""
+        return self.has_test_failure and not self.collect_failures
+
+    def feed(self, text: str) -> None:
+        if self.done:
+            return
+        for line in candidate_lines(text, PREFILTER_NEEDLES):
+            self._check(line)
+            if self.done:
+                return
+
+    def _check(self, text: str) -> None:
+        if not _ANY_RE.search(text):
+            return
+        if len(self.excerpt) < EXCERPT_LINES:
+            self.excerpt.extend(line for line in text.split("\n") if _ANY_RE.search(line))
+            del self.excerpt[EXCERPT_LINES:]
+        if _FAILURE_RE.search(text):
+            self.has_test_failure = True
+            if self.collect_failures:
+                for match in _TEST_RESULT_RE.finditer(text):
+                    if match["status"] == "failed":
+                        self.failing_tests.add(_result_id(match))
+        if not self.has_compile_error and _COMPILE_ERROR_RE.search(text):
+            self.has_compile_error = True
+
+    def verdict(self) -> tuple[bool, str]:
+        if self.has_compile_error and not self.has_test_failure:
+            return False, "Compile-Error ist KEIN echter TDD RED! Tests müssen kompilieren aber im Verhalten fehlschlagen."
+
+        if self.has_test_failure:
+            return True, "Echte Test-Failures gefunden."
+
+        return False, "Keine Test-Failures im Log gefunden. Tests müssen ausgeführt werden und fehlschlagen."
+
+
+class FollowVerifier(LogVerifier):
+    """
+    Verifier für einen noch wachsenden Log (--follow).
+
+    Strenger als die Batch-Regeln: die Reihenfolge zählt. Die erste echte
+    Test-Failure ohne vorherigen Compile-Error entscheidet für RED; ein
+    Compile-Error davor beendet das Verfolgen sofort als ungültig.
+
+    xcodebuild schreibt die XCTAssert-Zeile vor "Test Case '…' failed" -
+    nach der ersten Failure wird deshalb weitergelesen, bis eine Test-ID
+    da ist (höchstens ID_LOOKAHEAD_LINES Zeilen bzw. bis der Lauf endet).
+    Ohne Test-ID kein RED: der Abgleich im Gate braucht sie.
+    """
+
+    END_NEEDLES = ["** test succeeded **", "** test execute succeeded **", "** test failed **", "testing cancelled"]
+    ID_LOOKAHEAD_LINES = 2000
+
+    def __init__(self):
+        super().__init__(collect_failures=True)
+        self.run_finished = False
+        self.lines_after_failure = 0
+
+    @property
+    def done(self) -> bool:
+        if self.has_compile_error or self.run_finished:
+            return True
+        return self.has_test_failure and (
+            bool(self.failing_tests) or self.lines_after_failure >= self.ID_LOOKAHEAD_LINES
+        )
+
+    def feed(self, text: str) -> None:
+        if self.done:
+            return
+        if self.has_test_failure:
+            self.lines_after_failure += text.count("\n")
+        for line in candidate_lines(text, PREFILTER_NEEDLES + self.END_NEEDLES):
+            self._check(line)
+            if self.done:
+                return
+
+    def _check(self, text: str) -> None:
+        folded = text.lower()
+        if any(needle in folded for needle in self.END_NEEDLES):
+            self.run_finished = True
+        failed_before = self.has_test_failure
+        super()._check(text)
+        if failed_before:
+            # Compile-Errors nach der ersten Failure ändern das Urteil nicht mehr
+            self.has_compile_error = False
+
+    def verdict(self) -> tuple[bool, str]:
+        if self.has_compile_error:
+            return False, "Compile-Error vor der ersten Test-Failure - das ist KEIN echter TDD RED!"
+        if self.has_test_failure and not self.failing_tests:
+            return False, ("Test-Failure ohne \"Test Case '…' failed\"-Zeile - ohne Test-ID kein RED. "
+                           "Nach dem Lauf: tests_written --proof <log>")
+        if self.has_test_failure:
+            return True, "Echte Test-Failure gefunden (Log wird noch geschrieben)."
+        if self.run_finished:
+            return False, "Testlauf beendet ohne Test-Failures."
+        return False, "Timeout: keine Test-Failure im Log erschienen."
+
+
+def follow_log(path: Path, idle_timeout: float = 300.0, poll_interval: float = 0.5) -> tuple[FollowVerifier, int]:
+    """
+    Verfolgt einen wachsenden Log wie `tail -f`, bis das Ergebnis feststeht
+    oder idle_timeout Sekunden lang nichts Neues kam.
+
+    Gelesen wird ab dem letzten Byte-Offset; nur vollständige Zeilen werden
+    geprüft. Wird die Datei ersetzt oder gekürzt, beginnt die Prüfung neu.
+
+    Returns: (verifier, gelesene_bytes)
+    """
+    verifier = FollowVerifier()
+    offset = 0
+    inode = None
+    partial = b""
+    last_growth = time.monotonic()
+
+    while not verifier.done:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            st = None
+
+        if st is not None and (st.st_ino != inode or st.st_size < offset):
+            # Neue oder gekürzte Datei → von vorn
+            verifier, offset, inode, partial = FollowVerifier(), 0, st.st_ino, b""
+
+        if st is not None and st.st_size > offset:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read(st.st_size - offset)
+            offset += len(data)
+            last_growth = time.monotonic()
+
+            data = partial + data
+            cut = data.rfind(b"\n") + 1
+            partial = data[cut:]
+            if cut:
+                # Universal newlines wie beim Batch-Verifier
+                text = data[:cut].decode("utf-8", errors="replace")
+                verifier.feed(text.replace("\r\n", "\n").replace("\r", "\n"))
+            continue
+
+        if time.monotonic() - last_growth > idle_timeout:
+            break
+        time.sleep(poll_interval)
+
+    return verifier, offset - len(partial)
+
+
+def open_log(path: Path, binary: bool = False):
+    """Öffnet einen Log als Text (universal newlines), auch .gz/.xz - mit binary entpackt als Bytes."""
+    suffix = path.suffix.lower()
+    if binary:
+        opener = {".gz": gzip.open, ".xz": lzma.open}.get(suffix, open)
+        return opener(path, "rb")
+    if suffix == ".gz":
+        return gzip.open(path, "rt", errors="replace")
+    if suffix == ".xz":
+        return lzma.open(path, "rt", errors="replace")
+    return open(path, "r", errors="replace")
+
+
+def iter_blocks(stream, block_chars: int = BLOCK_CHARS):
+    """Liefert Textblöcke, die immer an einer Zeilengrenze enden."""
+    rest = ""
+    while True:
+        chunk = stream.read(block_chars)
+        if not chunk:
+            break
+        chunk = rest + chunk
+        cut = chunk.rfind("\n") + 1
+        if cut == 0:
+            rest = chunk
+            continue
+        yield chunk[:cut]
+        rest = chunk[cut:]
+    if rest:
+        yield rest
+
+
+def scan_log_file(path: Path, collect_failures: bool = False) -> LogVerifier:
+    """Lässt einen LogVerifier streamend über den Log laufen."""
+    verifier = LogVerifier(collect_failures)
+    with open_log(path) as f:
+        for block in iter_blocks(f):
+            verifier.feed(block)
+            if verifier.done:
+                break
+    return verifier
+
+
+def verify_log_file(path: Path) -> tuple[bool, str]:
+    """
+    Prüft einen Log-File streamend.
+
+    Returns: (is_valid, reason) - identisch zu verify_test_failure(read_text())
+    """
+    return scan_log_file(path).verdict()
+
+
+def verify_tests_pass(path: Path, expected: Optional[frozenset]) -> tuple[bool, str]:
+    """
+    GREEN-Beweis: Laufen genau die Tests aus dem RED-Index jetzt durch?
+
+    Es zählt der letzte Status je Test (Retries), der Log wird deshalb
+    immer bis zum Ende gelesen. Ohne Index (RED per
+    --user-verified) oder mit leerem (RED nur per Summary, ohne Test-IDs)
+    darf der Log keinen fehlgeschlagenen Test und keine Failure-Summary
+    enthalten.
+    """
+    if not expected:
+        expected = None
+    pending = set(expected or ())
+    failed = set()
+    passed_any = False
+    summary_failed = False
+
+    with open_log(path) as f:
+        for block in iter_blocks(f):
+            if expected is None and not summary_failed and _SUMMARY_FAILURE_RE.search(block):
+                summary_failed = True
+            for line in candidate_lines(block, ["test case '"]):
+                for match in _TEST_RESULT_RE.finditer(line):
+                    test_id = _result_id(match)
+                    ok = match["status"] == "passed"
+                    passed_any = passed_any or ok
+                    if expected is None:
+                        if not ok:
+                            failed.add(test_id)
+                    elif test_id in expected:
+                        if ok:
+                            pending.discard(test_id)
+                            failed.discard(test_id)
+                        else:
+                            pending.add(test_id)
+                            failed.add(test_id)
+
+    if failed:
+        names = ", ".join(sorted(failed)[:5])
+        return False, f"{len(failed)} Test(s) schlagen weiterhin fehl: {names}"
+
+    if expected is None:
+        if summary_failed:
+            return False, "Der Log meldet fehlgeschlagene Tests (Summary)."
+        if not passed_any:
+            return False, "Keine bestandenen Tests im Log gefunden."
+        return True, "Keine fehlgeschlagenen Tests im Log."
+
+    if pending:
+        names = ", ".join(sorted(pending)[:5])
+        return False, f"{len(pending)} Test(s) aus dem RED-Index fehlen im Log: {names}"
+
+    return True, f"Alle {len(expected)} RED-Tests bestehen jetzt."
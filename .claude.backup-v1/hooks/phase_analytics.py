@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Auswertung der Phasen-Historie: wo geht die Zeit eines Features hin?
+
+Quellen (alle gestreamt):
+  - das Journal (phase_history.jsonl + Segmente) bzw. beim SQLite-Backend
+    die phase_history-Tabelle aller Sessions
+  - "phase_history"-Listen in archivierten State-Dateien
+    (.claude*/workflow_state*.json, z.B. .claude.backup-v1/workflow_state.json)
+
+Ergebnisse:
+  - Zeit je Phase: Verteilung der abgeschlossenen Aufenthalte
+  - Rework-Schleifen: Übergänge zurück in dieselbe oder eine frühere Phase
+    (implementing → implementing, implementing → analysing, ...)
+  - Lead Time je Feature: erster Übergang bis zurück nach idle
+
+phase_analytics.json hält das Aggregat plus einen Cursor je Quelle
+(Journal: letzte seq, SQLite: letzte id, Archiv: Anzahl Einträge). Ein
+erneuter Lauf verarbeitet nur neue Einträge. Einträge ohne "feature" (alte
+State-Dateien) werden je Quelle in Episoden von idle bis idle gezählt.
+"""
+
+import glob
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+import phase_journal
+import state_store
+
+CLAUDE_DIR = Path(__file__).parent.parent
+PROJECT_DIR = CLAUDE_DIR.parent
+CACHE_FILE = CLAUDE_DIR / "phase_analytics.json"
+ARCHIVE_GLOB = ".claude*/workflow_state*.json"
+
+CACHE_VERSION = 1
+
+PHASE_ORDER = ["idle", "analysing", "spec_written", "spec_approved", "implementing", "validating"]
+
+
+class CacheInvalid(Exception):
+    """Eine Quelle wurde umgeschrieben - das Aggregat muss neu aufgebaut werden."""
+
+
+def empty_cache() -> dict:
+    return {"version": CACHE_VERSION, "backend": state_store.backend(),
+            "cursors": {}, "streams": {}, "phases": {}, "loops": {}, "features": {}}
+
+
+def load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, "r") as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return empty_cache()
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return empty_cache()
+    if cache.get("backend") != state_store.backend():
+        return empty_cache()  # SQLite enthält das migrierte Journal - nicht doppelt zählen
+    return cache
+
+
+def save_cache(cache: dict) -> None:
+    tmp = CACHE_FILE.with_name(f".{CACHE_FILE.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, CACHE_FILE)
+
+
+def _parse_ts(value) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rework(from_phase: str, to_phase: str) -> bool:
+    """Zurück in dieselbe oder eine frühere Phase (Reset nach idle zählt nicht)."""
+    if to_phase == "idle" or from_phase not in PHASE_ORDER or to_phase not in PHASE_ORDER:
+        return False
+    return PHASE_ORDER.index(to_phase) <= PHASE_ORDER.index(from_phase)
+
+
+def apply_entry(cache: dict, stream_id: str, entry: dict) -> None:
+    """Verrechnet einen Übergang mit dem Aggregat und dem offenen Zustand der Quelle."""
+    from_phase, to_phase = entry.get("from"), entry.get("to")
+    ts = _parse_ts(entry.get("timestamp"))
+    if not to_phase or ts is None:
+        return
+
+    stream = cache["streams"].setdefault(stream_id, {"phase": None, "since": None, "episode": 0, "feature": None})
+    previous = stream["feature"]
+    if from_phase == "idle" or previous is None:
+        stream["episode"] += 1
+    feature = entry.get("feature") or (
+        previous if previous and from_phase != "idle" else f"{stream_id} #{stream['episode']}"
+    )
+
+    # Aufenthalt in from_phase ist abgeschlossen - er gehört noch zum bisherigen Feature
+    since = _parse_ts(stream["since"])
+    if since is not None and stream["phase"] == from_phase and from_phase != "idle":
+        seconds = max(0.0, (ts - since).total_seconds())
+        cache["phases"].setdefault(from_phase, []).append(round(seconds, 1))
+        owner = cache["features"].get(previous or feature)
+        if owner is not None:
+            owner["phases"][from_phase] = round(owner["phases"].get(from_phase, 0.0) + seconds, 1)
+
+    record = cache["features"].setdefault(
+        feature, {"start": entry["timestamp"], "end": None, "last": None, "phase": None,
+                  "phases": {}, "rework": 0, "transitions": 0}
+    )
+    record["transitions"] += 1
+    record["last"] = entry["timestamp"]
+    record["phase"] = to_phase
+
+    # Wechsel auf ein anderes Feature ist kein Rework
+    if feature == previous and is_rework(from_phase, to_phase):
+        key = f"{from_phase} → {to_phase}"
+        cache["loops"][key] = cache["loops"].get(key, 0) + 1
+        record["rework"] += 1
+
+    if to_phase == "idle":
+        record["end"] = entry["timestamp"]
+        stream["feature"] = None
+    else:
+        record["end"] = None  # (wieder) in Arbeit
+        stream["feature"] = feature
+
+    stream["phase"] = to_phase
+    stream["since"] = entry["timestamp"]
+
+
+def _live_entries(cache: dict) -> Iterator[tuple[str, dict]]:
+    """Journal bzw. SQLite-Tabelle ab dem gespeicherten Cursor."""
+    cursors = cache["cursors"]
+    if state_store.backend() == "sqlite":
+        import state_sqlite
+
+        last_id = cursors.get("sqlite", 0)
+        for row_id, entry in state_sqlite.iter_history_after(last_id):
+            cursors["sqlite"] = row_id
+            yield f"sqlite:{entry.pop('session')}", entry
+        return
+
+    last_seq = cursors.get("journal")
+    seen = None
+    for entry in phase_journal.iter_history(after_seq=last_seq):
+        seen = entry.get("seq", seen)
+        if seen is not None:
+            cursors["journal"] = seen
+        yield "journal", entry
+    if last_seq is not None and seen is None and phase_journal.is_empty():
+        raise CacheInvalid("Journal wurde geleert")
+
+
+def archive_files(extra: Optional[list] = None) -> list[Path]:
+    """
+    Archivierte State-Dateien (per Glob) plus explizit angegebene - ohne
+    den aktiven State, dessen Historie über das Journal bzw. SQLite kommt.
+    """
+    live = state_store.STATE_FILE.resolve()
+    paths = [Path(p) for p in sorted(glob.glob(str(PROJECT_DIR / ARCHIVE_GLOB)))]
+    paths.extend(Path(p) for p in extra or ())
+    return list(dict.fromkeys(p.resolve() for p in paths if p.is_file() and p.resolve() != live))
+
+
+def _archive_entries(cache: dict, path: Path) -> Iterator[tuple[str, dict]]:
+    """Nur neue Einträge einer State-Datei (Listen wachsen nur am Ende)."""
+    try:
+        rel = str(path.relative_to(PROJECT_DIR.resolve()))
+    except ValueError:
+        rel = str(path)
+    st = path.stat()
+    key = f"archive:{rel}"
+    cursor = cache["cursors"].get(key)
+    if cursor and cursor["stat"] == [st.st_mtime_ns, st.st_size]:
+        return
+
+    try:
+        with open(path, "r") as f:
+            history = json.load(f).get("phase_history") or []
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return
+    done = cursor["count"] if cursor else 0
+    if len(history) < done:
+        raise CacheInvalid(f"{rel} wurde umgeschrieben")
+
+    cache["cursors"][key] = {"stat": [st.st_mtime_ns, st.st_size], "count": len(history)}
+    for entry in history[done:]:
+        if isinstance(entry, dict):
+            yield rel, entry
+
+
+def update(archives: Optional[list] = None, rebuild: bool = False) -> tuple[dict, int]:
+    """
+    Bringt das Aggregat auf den aktuellen Stand.
+
+    Returns: (cache, Anzahl neu verarbeiteter Übergänge)
+    """
+    cache = empty_cache() if rebuild else load_cache()
+    try:
+        processed = _consume(cache, archives)
+    except CacheInvalid:
+        cache = empty_cache()
+        processed = _consume(cache, archives)
+    if processed or rebuild:
+        save_cache(cache)
+    return cache, processed
+
+
+def _consume(cache: dict, archives: Optional[list]) -> int:
+    processed = 0
+    for path in archive_files(archives):
+        for stream_id, entry in _archive_entries(cache, path):
+            apply_entry(cache, stream_id, entry)
+            processed += 1
+    for stream_id, entry in _live_entries(cache):
+        apply_entry(cache, stream_id, entry)
+        processed += 1
+    return processed
+
+
+def lead_time(record: dict) -> Optional[float]:
+    """Sekunden vom ersten Übergang bis idle (bzw. bis zum letzten, wenn offen)."""
+    start = _parse_ts(record["start"])
+    end = _parse_ts(record["end"] or record["last"])
+    if start is None or end is None:
+        return None
+    return max(0.0, (end - start).total_seconds())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Append-only Journal für die Phasen-Historie.
+
+Die Historie lag früher als "phase_history"-Liste in workflow_state.json
+und wurde bei jedem Gate-Aufruf mitgeparst. Jetzt steht im State nur noch
+der kleine "heiße" Datensatz; jeder Übergang ist eine JSON-Zeile in
+phase_history.jsonl.
+
+Rotation/Kompaktierung:
+  - Überschreitet das aktive Journal ROTATE_BYTES, wird es gzip-komprimiert
+    als phase_history.<seq>.jsonl.gz abgelegt (<seq> = erste Sequenznummer)
+  - Gibt es mehr als MAX_SEGMENTS Segmente, werden sie zu einem
+    zusammengeführt (verlustfrei)
+"""
+
+import gzip
+import json
+import shutil
+from pathlib import Path
+from typing import Iterator, Optional
+
+CLAUDE_DIR = Path(__file__).parent.parent
+JOURNAL_FILE = CLAUDE_DIR / "phase_history.jsonl"
+SEGMENT_GLOB = "phase_history.*.jsonl.gz"
+
+ROTATE_BYTES = 1024 * 1024
+MAX_SEGMENTS = 8
+
+
+def segment_path(first_seq: int) -> Path:
+    return CLAUDE_DIR / f"phase_history.{first_seq:010d}.jsonl.gz"
+
+
+def segments() -> list[Path]:
+    """Rotierte Segmente in chronologischer Reihenfolge."""
+    return sorted(CLAUDE_DIR.glob(SEGMENT_GLOB))
+
+
+def is_empty() -> bool:
+    if JOURNAL_FILE.exists() and JOURNAL_FILE.stat().st_size > 0:
+        return False
+    return not segments()
+
+
+def append(entries: list[dict]) -> None:
+    """Hängt Einträge (mit "seq") an und rotiert bei Bedarf."""
+    if not entries:
+        return
+    with open(JOURNAL_FILE, "a") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    if JOURNAL_FILE.stat().st_size >= ROTATE_BYTES:
+        rotate()
+
+
+def _first_seq(path: Path, opener=open) -> Optional[int]:
+    with opener(path, "rt") as f:
+        for line in f:
+            if line.strip():
+                return json.loads(line).get("seq")
+    return None
+
+
+def rotate() -> Optional[Path]:
+    """Komprimiert das aktive Journal zu einem Segment."""
+    if not JOURNAL_FILE.exists() or JOURNAL_FILE.stat().st_size == 0:
+        return None
+
+    first_seq = _first_seq(JOURNAL_FILE) or 0
+    target = segment_path(first_seq)
+    with open(JOURNAL_FILE, "rb") as src, gzip.open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    JOURNAL_FILE.unlink()
+
+    if len(segments()) > MAX_SEGMENTS:
+        compact()
+    return target
+
+
+def compact() -> Optional[Path]:
+    """Führt alle rotierten Segmente zu einem einzigen zusammen."""
+    parts = segments()
+    if len(parts) < 2:
+        return None
+
+    merged = CLAUDE_DIR / "phase_history.compacting.tmp"
+    with gzip.open(merged, "wb") as dst:
+        for part in parts:
+            with gzip.open(part, "rb") as src:
+                shutil.copyfileobj(src, dst)
+
+    # Erstes Segment behält seinen Namen (= erste Sequenznummer)
+    merged.replace(parts[0])
+    for part in parts[1:]:
+        part.unlink()
+    return parts[0]
+
+
+def _iter_file(path: Path, opener) -> Iterator[dict]:
+    with opener(path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Abgeschnittene letzte Zeile nach Absturz ignorieren
+                continue
+
+
+def iter_history(after_seq: Optional[int] = None) -> Iterator[dict]:
+    """
+    Streamt alle Einträge chronologisch, ohne alles zu laden. Mit after_seq
+    nur neuere Einträge - Segmente, die komplett davor liegen, werden gar
+    nicht erst geöffnet (der Dateiname enthält die erste Sequenznummer).
+    """
+    parts = segments()
+    for i, part in enumerate(parts):
+        if after_seq is not None and i + 1 < len(parts) and int(parts[i + 1].name.split(".")[1]) <= after_seq + 1:
+            continue
+        for entry in _iter_file(part, gzip.open):
+            if after_seq is None or entry.get("seq", 0) > after_seq:
+                yield entry
+    if JOURNAL_FILE.exists():
+        for entry in _iter_file(JOURNAL_FILE, open):
+            if after_seq is None or entry.get("seq", 0) > after_seq:
+                yield entry
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Inhaltsadressierter Speicher für TDD-Beweise.
+
+Früher wurde jeder akzeptierte Log komplett nach tdd_proof.log kopiert
+(und der vorige Beweis überschrieben). Jetzt:
+  - proofs/<sha256>.log.xz       der Log, lzma-komprimiert
+  - proofs/<sha256>.excerpt.txt  nur die entscheidenden Zeilen, unkomprimiert
+
+Der Hash wird über den (entpackten) Log-Inhalt gebildet, derselbe Log
+wird also nur einmal abgelegt. Hashen und Komprimieren passieren im selben
+Durchlauf. Alte Beweise werden nach Alter bzw. Gesamtgröße aufgeräumt.
+"""
+
+import hashlib
+import lzma
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from log_verify import open_log
+
+CLAUDE_DIR = Path(__file__).parent.parent
+PROOFS_DIR = CLAUDE_DIR / "proofs"
+
+CHUNK_BYTES = 1024 * 1024
+MAX_AGE_DAYS = 30
+MAX_TOTAL_BYTES = 50 * 1024 * 1024
+
+
+def log_path(digest: str) -> Path:
+    return PROOFS_DIR / f"{digest}.log.xz"
+
+
+def excerpt_path(digest: str) -> Path:
+    return PROOFS_DIR / f"{digest}.excerpt.txt"
+
+
+def digest_of(proof: Optional[str]) -> Optional[str]:
+    """Hash aus einem tdd_proof-Wert wie "log_verified:<sha256>"."""
+    if not proof or not proof.startswith("log_verified:"):
+        return None
+    digest = proof.split(":", 1)[1]
+    if len(digest) != 64 or not log_path(digest).exists():
+        return None  # Alter Zeitstempel-Beweis oder schon aufgeräumt
+    return digest
+
+
+def store(source: Path, excerpt: list[str], limit: Optional[int] = None) -> str:
+    """
+    Legt source (höchstens limit Bytes) im Store ab.
+
+    Returns: sha256 des Inhalts
+    """
+    PROOFS_DIR.mkdir(exist_ok=True)
+    tmp = PROOFS_DIR / f".incoming.{os.getpid()}.xz"
+    sha = hashlib.sha256()
+
+    with open_log(source, binary=True) as src, lzma.open(tmp, "wb", preset=1) as dst:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            chunk = src.read(CHUNK_BYTES if remaining is None else min(remaining, CHUNK_BYTES))
+            if not chunk:
+                break
+            sha.update(chunk)
+            dst.write(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+
+    digest = sha.hexdigest()
+    target = log_path(digest)
+    if target.exists():
+        # Gleicher Log schon vorhanden - nur als frisch markieren
+        tmp.unlink()
+        os.utime(target)
+    else:
+        tmp.replace(target)
+
+    excerpt_path(digest).write_text(
+        f"# Quelle: {source}\n" + "".join(line.rstrip("\n") + "\n" for line in excerpt)
+    )
+    return digest
+
+
+def entries() -> list[tuple[str, float, int]]:
+    """Alle Beweise als (hash, mtime, bytes), älteste zuerst."""
+    if not PROOFS_DIR.exists():
+        return []
+    found = []
+    for path in PROOFS_DIR.glob("*.log.xz"):
+        digest = path.name[: -len(".log.xz")]
+        st = path.stat()
+        size = st.st_size
+        if excerpt_path(digest).exists():
+            size += excerpt_path(digest).stat().st_size
+        found.append((digest, st.st_mtime, size))
+    return sorted(found, key=lambda entry: entry[1])
+
+
+def remove(digest: str) -> None:
+    for path in (log_path(digest), excerpt_path(digest)):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def prune(keep: Union[str, Iterable[str], None] = None, max_age_days: float = MAX_AGE_DAYS,
+          max_total_bytes: int = MAX_TOTAL_BYTES) -> list[str]:
+    """
+    Löscht Beweise älter als max_age_days und danach die ältesten, bis die
+    Gesamtgröße passt. keep (der aktuelle Beweis bzw. mehrere Hashes)
+    bleibt immer erhalten.
+
+    Returns: gelöschte Hashes
+    """
+    keep = {keep} if isinstance(keep, str) else set(keep or ())
+    cutoff = time.time() - max_age_days * 86400
+    current = entries()
+    total = sum(size for _, _, size in current)
+    removed = []
+
+    for digest, mtime, size in current:
+        if digest in keep:
+            continue
+        if mtime < cutoff or total > max_total_bytes:
+            remove(digest)
+            removed.append(digest)
+            total -= size
+    return removed
+
+
+def read_excerpt(digest: str) -> str:
+    path = excerpt_path(digest)
+    return path.read_text() if path.exists() else ""
+
+
+def open_proof(digest: str):
+    """Öffnet den vollständigen Log eines Beweises als Text."""
+    return lzma.open(log_path(digest), "rt", errors="replace")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+SQLite-Backend (WAL) für den Workflow-State.
+
+Für mehrere Sessions/Worktrees gegen dieselbe Datenbank:
+  - state:         eine Zeile pro Session (Default-Session = Checkout-Pfad)
+  - features:      letzte Phase je Feature
+  - phase_history: Übergänge, Index auf (feature, ts)
+
+Der Gate-Lesepfad ist ein einziger Primärschlüssel-Lookup auf einer
+nackten Verbindung. Im WAL-Modus blockieren Schreiber keine Leser.
+Schema und WAL legt der erste Schreiber einmal je Datenbank an
+(PRAGMA user_version); workflow_state.json und das JSONL-Journal werden
+einmal je Session übernommen - beim ersten Schreiben oder wenn ein
+Leser für die Session noch keinen State findet.
+
+Aktiviert über WORKFLOW_STATE_BACKEND=sqlite oder settings.json
+("workflowGate" → "stateBackend"). Datenbank: WORKFLOW_STATE_DB oder
+.claude/workflow_state.db; Session: WORKFLOW_SESSION oder Projektpfad.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from state_store import STATE_FILE, StaleStateError, tag_legacy_history
+
+CLAUDE_DIR = Path(__file__).parent.parent
+PROJECT_DIR = CLAUDE_DIR.parent
+DB_FILE = Path(os.environ.get("WORKFLOW_STATE_DB") or CLAUDE_DIR / "workflow_state.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    session  TEXT PRIMARY KEY,
+    feature  TEXT,
+    revision INTEGER NOT NULL,
+    data     TEXT NOT NULL,
+    updated  TEXT
+);
+CREATE TABLE IF NOT EXISTS features (
+    feature TEXT PRIMARY KEY,
+    session TEXT,
+    phase   TEXT,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS phase_history (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    session    TEXT,
+    seq        INTEGER,
+    feature    TEXT,
+    from_phase TEXT,
+    to_phase   TEXT,
+    ts         TEXT
+);
+CREATE INDEX IF NOT EXISTS phase_history_feature_ts ON phase_history (feature, ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+SCHEMA_VERSION = 1  # PRAGMA user_version, sobald SCHEMA angelegt ist
+
+# Eine Verbindung pro Thread (gate_server beantwortet parallel)
+_local = threading.local()
+
+
+def session_key() -> str:
+    return os.environ.get("WORKFLOW_SESSION") or str(PROJECT_DIR.resolve())
+
+
+def connect() -> sqlite3.Connection:
+    """Verbindung des Threads ohne Setup - reicht für Punkt-Lookups."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(str(DB_FILE), timeout=10, isolation_level=None)
+        _local.conn = conn
+    return conn
+
+
+def prepared() -> sqlite3.Connection:
+    """Verbindung mit Schema und übernommenem JSON-State (Schreib- und Historienpfad)."""
+    conn = connect()
+    if not getattr(_local, "prepared", False):
+        _setup(conn)
+        _local.prepared = True
+    return conn
+
+
+def _setup(conn: sqlite3.Connection) -> None:
+    """Schema + WAL einmal je Datenbank, JSON-Übernahme einmal je Session."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        conn.execute("PRAGMA journal_mode=WAL")  # bleibt in der Datei gesetzt
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.execute("PRAGMA synchronous=NORMAL")  # gilt je Verbindung, nur für Schreiber relevant
+    _migrate_json(conn)
+
+
+def _put_state(conn: sqlite3.Connection, state: dict) -> None:
+    feature = state.get("feature_name")
+    now = state.get("last_updated") or datetime.now().isoformat()
+    conn.execute(
+        "INSERT OR REPLACE INTO state (session, feature, revision, data, updated) VALUES (?, ?, ?, ?, ?)",
+        (session_key(), feature, state.get("revision", 0), json.dumps(state), now),
+    )
+    if feature:
+        conn.execute(
+            "INSERT OR REPLACE INTO features (feature, session, phase, updated) VALUES (?, ?, ?, ?)",
+            (feature, session_key(), state.get("current_phase"), now),
+        )
+
+
+def _insert_history(conn: sqlite3.Connection, entries: list[dict]) -> None:
+    conn.executemany(
+        "INSERT INTO phase_history (session, seq, feature, from_phase, to_phase, ts) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (session_key(), e.get("seq"), e.get("feature"), e.get("from"), e.get("to"), e.get("timestamp"))
+            for e in entries
+        ],
+    )
+
+
+def _migrated(conn: sqlite3.Connection, marker: str) -> bool:
+    """Schon übernommen - per Marker oder weil die Session bereits einen State hat."""
+    return bool(
+        conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone()
+        or conn.execute("SELECT 1 FROM state WHERE session = ?", (session_key(),)).fetchone()
+    )
+
+
+def _migrate_json(conn: sqlite3.Connection) -> None:
+    """
+    Übernimmt workflow_state.json + Journal einmalig in die Datenbank -
+    je Session, denn mehrere Worktrees teilen sich ggf. eine Datenbank.
+    """
+    marker = f"migrated_json:{session_key()}"
+    if _migrated(conn, marker):
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Nochmals unter dem Schreib-Lock prüfen - ein Parallelprozess war evtl. schneller
+        if not _migrated(conn, marker):
+            if STATE_FILE.exists():
+                import phase_journal
+
+                with open(STATE_FILE, "r") as f:
+                    state = json.load(f)
+                legacy = state.pop("phase_history", None) or []
+                _put_state(conn, state)
+                journal = list(phase_journal.iter_history())
+                _insert_history(conn, journal or tag_legacy_history(legacy, state.get("feature_name")))
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, datetime.now().isoformat()))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def read() -> Optional[dict]:
+    """Punkt-Lookup des Session-States. None, wenn es noch keinen gibt."""
+    query = "SELECT data FROM state WHERE session = ?"
+    try:
+        row = connect().execute(query, (session_key(),)).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # Datenbank noch ohne Schema
+    if row is None and not getattr(_local, "prepared", False):
+        # Erster Zugriff der Session: evtl. liegt der State noch in workflow_state.json
+        row = prepared().execute(query, (session_key(),)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def version() -> tuple:
+    """
+    Ändert sich mit jedem update() der Session: (revision, updated).
+
+    Nicht PRAGMA data_version - das ist nur innerhalb einer Verbindung
+    vergleichbar, der Gate-Server fragt aber aus wechselnden Threads.
+    """
+    try:
+        row = connect().execute(
+            "SELECT revision, updated FROM state WHERE session = ?", (session_key(),)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # Datenbank noch ohne Schema
+    return tuple(row) if row else (None, None)
+
+
+def update(fn: Callable[[dict], Optional[dict]], default: Callable[[], dict] = dict,
+           expected_revision: Optional[int] = None) -> dict:
+    """Wie state_store.update, aber als SQLite-Transaktion (BEGIN IMMEDIATE)."""
+    conn = prepared()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT data FROM state WHERE session = ?", (session_key(),)).fetchone()
+        state = json.loads(row[0]) if row else default()
+        revision = state.get("revision", 0)
+        if expected_revision is not None and revision != expected_revision:
+            raise StaleStateError(f"revision {revision} != {expected_revision}")
+
+        result = fn(state)
+        if result is not None:
+            state = result
+        state["revision"] = revision + 1
+        _put_state(conn, state)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return state
+
+
+def append_history(entries: list[dict]) -> None:
+    """Innerhalb von update() Teil derselben Transaktion."""
+    conn = prepared()
+    if conn.in_transaction:
+        _insert_history(conn, entries)
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _insert_history(conn, entries)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def iter_history(feature: Optional[str] = None, since: Optional[str] = None) -> Iterator[dict]:
+    """Übergänge chronologisch; feature/since nutzen den (feature, ts)-Index."""
+    query = "SELECT seq, from_phase, to_phase, ts, feature FROM phase_history"
+    clauses, params = [], []
+    if feature:
+        clauses.append("feature = ?")
+        params.append(feature)
+    if since:
+        clauses.append("ts >= ?")
+        params.append(since)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY ts, id" if feature else " ORDER BY id"
+
+    for seq, from_phase, to_phase, ts, feat in prepared().execute(query, params):
+        yield {"seq": seq, "from": from_phase, "to": to_phase, "timestamp": ts, "feature": feat}
+
+
+def iter_history_after(last_id: int) -> Iterator[tuple[int, dict]]:
+    """Alle Übergänge aller Sessions mit id > last_id (inkrementelle Auswertungen)."""
+    query = (
+        "SELECT id, session, seq, from_phase, to_phase, ts, feature FROM phase_history"
+        " WHERE id > ? ORDER BY id"
+    )
+    for row_id, session, seq, from_phase, to_phase, ts, feat in prepared().execute(query, (last_id,)):
+        yield row_id, {"seq": seq, "from": from_phase, "to": to_phase, "timestamp": ts,
+                       "feature": feat, "session": session}
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Transaktionsschicht für workflow_state.json.
+
+Früher hat update_state.py die Datei mit "w" geöffnet und direkt
+hineingeschrieben; ein parallel laufendes Gate konnte dabei eine halbe
+Datei lesen und fiel dann still auf "idle" zurück. Jetzt:
+  - Schreiben: Temp-Datei im selben Verzeichnis, fsync, os.replace -
+    Leser sehen immer entweder den alten oder den neuen State
+  - Schreiber koordinieren sich über einen fcntl-Lock auf einer eigenen
+    Lock-Datei (der State selbst wird ja ersetzt, nicht geändert)
+  - Leser nehmen nie einen Lock
+  - update(fn) liest unter dem Lock, wendet fn an und schreibt mit
+    hochgezählter "revision" zurück - parallele Slash-Commands verlieren
+    so keinen Übergang mehr
+
+Backends: "json" (Default, diese Datei) oder "sqlite" (state_sqlite.py,
+WAL, für mehrere Sessions/Worktrees). Auswahl über die Umgebungsvariable
+WORKFLOW_STATE_BACKEND oder settings.json ("workflowGate" → "stateBackend").
+read(), update(), append_history() und iter_history() leiten entsprechend
+weiter; sqlite3 wird nur für das SQLite-Backend importiert.
+"""
+
+import fcntl
+import functools
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+CLAUDE_DIR = Path(__file__).parent.parent
+STATE_FILE = CLAUDE_DIR / "workflow_state.json"
+LOCK_FILE = CLAUDE_DIR / "workflow_state.lock"
+SETTINGS_FILE = CLAUDE_DIR / "settings.json"
+BACKEND_ENV = "WORKFLOW_STATE_BACKEND"
+
+
+class StaleStateError(Exception):
+    """Der State wurde seit dem Lesen von jemand anderem geändert."""
+
+
+@functools.lru_cache(maxsize=1)
+def backend() -> str:
+    """"sqlite" oder "json" - einmal pro Prozess bestimmt."""
+    value = os.environ.get(BACKEND_ENV)
+    if not value:
+        try:
+            with open(SETTINGS_FILE, "r") as f:
+                value = json.load(f).get("workflowGate", {}).get("stateBackend")
+        except (json.JSONDecodeError, IOError, AttributeError):
+            value = None
+    return "sqlite" if value == "sqlite" else "json"
+
+
+def _sqlite(path: Path):
+    """state_sqlite, falls das SQLite-Backend für diesen Pfad aktiv ist."""
+    if path != STATE_FILE or backend() != "sqlite":
+        return None
+    import state_sqlite
+    return state_sqlite
+
+
+def read(path: Path = STATE_FILE) -> Optional[dict]:
+    """Lock-freies Lesen. None, wenn es noch keinen State gibt."""
+    db = _sqlite(path)
+    if db:
+        return db.read()
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write(state: dict, path: Path = STATE_FILE) -> None:
+    """Schreibt atomar: Temp-Datei + fsync + rename (+ fsync des Verzeichnisses)."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+@contextmanager
+def locked(lock_file: Path = LOCK_FILE):
+    """Exklusiver Schreib-Lock (advisory, wird beim Prozessende frei)."""
+    with open(lock_file, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def update(fn: Callable[[dict], Optional[dict]], default: Callable[[], dict] = dict,
+           expected_revision: Optional[int] = None, path: Path = STATE_FILE) -> dict:
+    """
+    Read-modify-write unter dem Lock.
+
+    fn bekommt den aktuellen State und ändert ihn (oder gibt einen neuen
+    zurück). Mit expected_revision verhält sich update wie compare-and-swap:
+    hat sich der State seit dem eigenen Lesen geändert, gibt es
+    StaleStateError statt eines stillen Überschreibens.
+
+    Returns: der geschriebene State
+    """
+    db = _sqlite(path)
+    if db:
+        return db.update(fn, default, expected_revision)
+
+    with locked(path.with_suffix(".lock")):
+        state = read(path)
+        if state is None:
+            state = default()
+        revision = state.get("revision", 0)
+        if expected_revision is not None and revision != expected_revision:
+            raise StaleStateError(f"revision {revision} != {expected_revision}")
+
+        result = fn(state)
+        if result is not None:
+            state = result
+        state["revision"] = revision + 1
+        write(state, path)
+        return state
+
+
+def change_token(path: Path = STATE_FILE):
+    """Billiger Wert, der sich bei jeder Änderung des States ändert (für Caches)."""
+    db = _sqlite(path)
+    if db:
+        return ("sqlite", db.version())
+    try:
+        st = path.stat()
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        return None
+
+
+def tag_legacy_history(legacy: list, feature: Optional[str]) -> list[dict]:
+    """
+    Eingebettete phase_history hat kein "feature": Die letzte Episode (ab
+    dem letzten Start aus idle) gehört zum Feature im State, ältere bleiben
+    ohne (Auswertungen zählen sie als eigene Episoden).
+    """
+    legacy = [entry for entry in legacy if isinstance(entry, dict)]
+    current = max((i for i, entry in enumerate(legacy) if entry.get("from") == "idle"), default=0)
+    return [
+        {"feature": feature if i >= current else None, **entry}
+        for i, entry in enumerate(legacy)
+    ]
+
+
+def append_history(entries: list[dict]) -> None:
+    """Phasenwechsel anhängen - JSONL-Journal oder phase_history-Tabelle."""
+    db = _sqlite(STATE_FILE)
+    if db:
+        db.append_history(entries)
+        return
+    import phase_journal
+    phase_journal.append(entries)
+
+
+def iter_history(feature: Optional[str] = None, since: Optional[str] = None) -> Iterator[dict]:
+    """Übergänge chronologisch, optional vorgefiltert."""
+    db = _sqlite(STATE_FILE)
+    if db:
+        yield from db.iter_history(feature, since)
+        return
+    import phase_journal
+    for entry in phase_journal.iter_history():
+        if feature and entry.get("feature") != feature:
+            continue
+        if since and entry.get("timestamp", "") < since:
+            continue
+        yield entry
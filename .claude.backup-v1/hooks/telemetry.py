@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Latenz-Telemetrie der Hooks als binärer Ringpuffer.
+
+telemetry.bin hat eine feste Größe: ein Header und CAPACITY Slots à
+RECORD.size Bytes. Ein Eintrag ist ein struct mit Zeitstempel, Quelle,
+Ergebnis und sechs Stufen-Zeiten in Mikrosekunden:
+
+  startup  Modul-Import bis main()
+  parse    stdin/argv lesen
+  state    State laden/schreiben
+  classify Pfad-Klasse bestimmen
+  decide   Entscheidung bzw. eigentliche Arbeit
+  total    gesamte gemessene Zeit
+
+Anhängen = Lock, Cursor lesen, zwei pwrite - wenige Mikrosekunden. Fehler
+beim Schreiben werden verschluckt, Telemetrie darf keinen Hook blockieren.
+WORKFLOW_TELEMETRY=0 schaltet sie ab.
+
+Ohne pathlib: gate_fast.py lädt das Modul auf seinem schnellsten Pfad.
+"""
+
+import fcntl
+import os
+import struct
+import time
+
+CLAUDE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TELEMETRY_FILE = os.path.join(CLAUDE_DIR, "telemetry.bin")
+
+MAGIC = b"WGT1"
+HEADER = struct.Struct("<4sII")      # magic, capacity, nächster Slot
+RECORD = struct.Struct("<dBBxx6I")   # timestamp, source, verdict, 6 Stufen (µs)
+CAPACITY = 4096
+
+STAGES = ("startup", "parse", "state", "classify", "decide", "total")
+SOURCES = ("gate", "client", "update_state", "fast")
+VERDICTS = ("allow", "block", "error", "ok")
+
+
+def enabled() -> bool:
+    return os.environ.get("WORKFLOW_TELEMETRY", "1") != "0"
+
+
+def micros(seconds: float) -> int:
+    return max(0, min(int(seconds * 1_000_000), 0xFFFFFFFF))
+
+
+def _open(path: str) -> int:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    if os.fstat(fd).st_size < HEADER.size:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < HEADER.size:
+                os.ftruncate(fd, HEADER.size + CAPACITY * RECORD.size)
+                os.pwrite(fd, HEADER.pack(MAGIC, CAPACITY, 0), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    return fd
+
+
+def record(source: str, verdict: str, timings: dict, path: str = TELEMETRY_FILE) -> None:
+    """Hängt einen Eintrag an (Stufen-Zeiten in Sekunden)."""
+    if not enabled():
+        return
+    try:
+        fd = _open(path)
+    except OSError:
+        return
+    try:
+        data = RECORD.pack(
+            time.time(),
+            SOURCES.index(source),
+            VERDICTS.index(verdict),
+            *(micros(timings.get(stage, 0.0)) for stage in STAGES),
+        )
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        magic, capacity, cursor = HEADER.unpack(os.pread(fd, HEADER.size, 0))
+        if magic != MAGIC or not capacity:
+            return
+        os.pwrite(fd, data, HEADER.size + (cursor % capacity) * RECORD.size)
+        os.pwrite(fd, HEADER.pack(MAGIC, capacity, (cursor + 1) % capacity), 0)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)  # gibt auch den Lock frei
+
+
+def read_records(path: str = TELEMETRY_FILE) -> list[dict]:
+    """Alle belegten Slots, älteste zuerst."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    if len(data) < HEADER.size:
+        return []
+    magic, capacity, cursor = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        return []
+
+    records = []
+    for i in range(capacity):
+        slot = (cursor + i) % capacity
+        offset = HEADER.size + slot * RECORD.size
+        if offset + RECORD.size > len(data):
+            break
+        timestamp, source, verdict, *stages = RECORD.unpack_from(data, offset)
+        if not timestamp:
+            continue
+        entry = {"timestamp": timestamp, "source": SOURCES[source], "verdict": VERDICTS[verdict]}
+        entry.update(zip(STAGES, stages))
+        records.append(entry)
+    return records
+
+
+def percentile(sorted_values: list, pct: float) -> int:
+    """Nearest-rank-Perzentil einer sortierten Liste."""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
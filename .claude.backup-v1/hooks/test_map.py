@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Zuordnung Tests → Produktions-Dateien für den TDD-Abgleich im Gate.
+
+Ein lexikalischer Scan (kein Swift-Parser) liefert:
+  - je Testmethode ("Klasse.testMethode", wie im RED-Index) die
+    Typnamen, die sie benutzt - inkl. der Klassen-Ebene (Properties,
+    Helper, setUp), denn die gilt für jede Testmethode der Klasse;
+  - je Produktions-Datei die Typen, die sie deklariert oder erweitert.
+
+Daraus folgt: Produktions-Datei X ist von Test T abgedeckt, wenn T einen
+Typ benutzt, den X deklariert. Gescannt wird inkrementell: test_map.json
+merkt sich (mtime, Größe) und SHA-1 jeder Datei, nur geänderte Dateien
+werden neu gelesen.
+
+Beim TDD RED schreibt update_state.py daraus tdd_coverage.idx: für jede
+Datei, die überhaupt von Tests erreicht wird, ob die fehlgeschlagenen
+Tests sie abdecken. Das Gate prüft damit pro Aufruf per Binärsuche
+(mmap, wie file_index.idx), ob der RED-Beweis zur bearbeiteten Datei
+passt - ohne die Datei zu parsen. Dateien, die kein Test
+erreicht (z.B. ganz neue), kann der Abgleich nicht beurteilen - sie
+gelten als abgedeckt. Ein RED ohne Test-IDs deckt keine getestete Datei
+ab; nur --user-verified umgeht den Abgleich.
+
+Aufruf:
+  python3 test_map.py refresh           # Cache aktualisieren
+  python3 test_map.py show <pfad>       # Tests, die eine Datei abdecken
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Optional
+
+CLAUDE_DIR = Path(__file__).parent.parent
+PROJECT_DIR = CLAUDE_DIR.parent
+CACHE_FILE = CLAUDE_DIR / "test_map.json"
+COVERAGE_FILE = CLAUDE_DIR / "tdd_coverage.idx"
+USER_VERIFIED_PREFIX = "user_verified:"  # tdd_proof nach --user-verified
+
+CACHE_VERSION = 1
+
+# Kommentare und String-Literale vor dem Scan entfernen
+NOISE = re.compile(r'//[^\n]*|/\*.*?\*/|"""(?:.|\n)*?"""|"(?:\\.|[^"\\\n])*"', re.S)
+
+# Typ-Deklarationen (Modifier/Attribute davor sind egal)
+TYPE_DECL = re.compile(r"\b(?:class|struct|enum|protocol|actor|extension)\s+([A-Z]\w*)")
+
+# Ein Durchlauf über die Test-Datei: Klammern, Deklarationen, Typnamen
+TOKEN = re.compile(
+    r"(?P<open>\{)|(?P<close>\})"
+    r"|(?P<attr>@Test\b)"
+    r"|\bfunc\s+(?P<func>\w+)"
+    r"|\b(?:class|struct|enum|extension|actor)\s+(?P<type>[A-Z]\w*)"
+    r"|(?P<ident>\b[A-Z]\w*)"
+)
+
+
+def scan_tests(source: str) -> dict:
+    """
+    Testmethoden einer Test-Datei mit den benutzten Typnamen.
+
+    Returns: {"Klasse.testMethode": [Typnamen, ...]}
+    """
+    source = NOISE.sub(" ", source)
+    depth = 0
+    scopes = []           # [(art, name, tiefe)] - art: "type" oder "test"
+    pending = None        # Deklaration, deren "{" noch aussteht
+    test_attr = False
+    tests = {}            # "Klasse.test" → set
+    class_idents = {}     # Klasse → set (alles außerhalb der Testmethoden)
+
+    for m in TOKEN.finditer(source):
+        kind = m.lastgroup
+        if kind == "open":
+            depth += 1
+            if pending is not None:
+                scopes.append((*pending, depth))
+                pending = None
+        elif kind == "close":
+            depth -= 1
+            while scopes and scopes[-1][2] > depth:
+                scopes.pop()
+        elif kind == "attr":
+            test_attr = True
+        elif kind == "func":
+            name = m.group("func")
+            is_test = test_attr or name.startswith("test")
+            test_attr = False
+            owner = next((s[1] for s in reversed(scopes) if s[0] == "type"), None)
+            if is_test and owner:
+                pending = ("test", f"{owner}.{name}")
+                tests.setdefault(pending[1], set())
+            else:
+                pending = None
+        elif kind == "type":
+            pending = ("type", m.group("type"))
+        elif scopes:
+            ident = m.group("ident")
+            scope_kind, scope_name, _ = scopes[-1]
+            if scope_kind == "test":
+                tests[scope_name].add(ident)
+            else:
+                class_idents.setdefault(scope_name, set()).add(ident)
+
+    return {
+        test_id: sorted(idents | class_idents.get(test_id.split(".", 1)[0], set()))
+        for test_id, idents in tests.items()
+    }
+
+
+def scan_types(source: str) -> list[str]:
+    """Typen, die eine Produktions-Datei deklariert oder erweitert."""
+    return sorted(set(TYPE_DECL.findall(NOISE.sub(" ", source))))
+
+
+def _load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, "r") as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def _swift_files() -> tuple[list[str], list[str]]:
+    """(Test-Dateien, Produktions-Dateien) laut Datei-Index."""
+    import file_index
+
+    file_index.refresh()
+    tests, production = [], []
+    for rel_path, path_class in file_index._load_entries().items():
+        if not rel_path.endswith(".swift"):
+            continue
+        if path_class == "test":
+            tests.append(rel_path)
+        elif path_class not in ("allowed", "other"):
+            production.append(rel_path)
+    return tests, production
+
+
+def refresh() -> dict:
+    """
+    Aktualisiert den Cache inkrementell.
+
+    Returns: {"tests": {rel: {test_id: [typen]}}, "types": {rel: [typen]}, "scanned": n}
+    """
+    old = _load_cache()
+    test_files, production_files = _swift_files()
+    files = {}
+    scanned = 0
+
+    for rel_path, kind in [(p, "tests") for p in test_files] + [(p, "types") for p in production_files]:
+        path = PROJECT_DIR / rel_path
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        stat_key = [st.st_mtime_ns, st.st_size]
+        entry = old.get(rel_path)
+        if entry and entry.get("stat") == stat_key and kind in entry:
+            files[rel_path] = entry
+            continue
+
+        try:
+            data = path.read_bytes()
+        except OSError:
+            continue
+        sha1 = hashlib.sha1(data).hexdigest()
+        if entry and entry.get("sha1") == sha1 and kind in entry:
+            entry["stat"] = stat_key
+            files[rel_path] = entry
+            continue
+
+        scanned += 1
+        source = data.decode("utf-8", errors="replace")
+        result = scan_tests(source) if kind == "tests" else scan_types(source)
+        files[rel_path] = {"stat": stat_key, "sha1": sha1, kind: result}
+
+    tmp = CACHE_FILE.with_name(f".{CACHE_FILE.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"version": CACHE_VERSION, "files": files}, f, separators=(",", ":"))
+    os.replace(tmp, CACHE_FILE)
+
+    return {
+        "tests": {p: e["tests"] for p, e in files.items() if "tests" in e},
+        "types": {p: e["types"] for p, e in files.items() if "types" in e},
+        "scanned": scanned,
+    }
+
+
+def build_map(scan: dict) -> dict:
+    """Produktions-Datei → Menge der Test-IDs, die einen ihrer Typen benutzen."""
+    files_by_type = {}
+    for rel_path, types in scan["types"].items():
+        for type_name in types:
+            files_by_type.setdefault(type_name, []).append(rel_path)
+
+    covering = {}
+    for tests in scan["tests"].values():
+        for test_id, idents in tests.items():
+            for ident in idents:
+                for rel_path in files_by_type.get(ident, ()):
+                    covering.setdefault(rel_path, set()).add(test_id)
+    return covering
+
+
+def save_coverage(proof: str, failing_tests: set) -> tuple[int, int]:
+    """
+    Schreibt tdd_coverage.idx für einen RED-Beweis: sortierte Zeilen
+    "pfad<TAB>+" = von den fehlgeschlagenen Tests abgedeckt, "pfad<TAB>-" =
+    nur von anderen Tests.
+
+    Ohne Test-IDs (nur Summary im Log) deckt der Beweis nichts ab - der
+    Index bekommt dann nur "-"-Zeilen, statt zu fehlen.
+
+    Returns: (abgedeckte Dateien, von Tests erreichte Dateien)
+    """
+    covering = build_map(refresh())
+    lines = sorted(
+        f"{rel_path}\t{'+' if tests & failing_tests else '-'}".encode("utf-8", errors="surrogateescape")
+        for rel_path, tests in covering.items()
+    )
+    tmp = COVERAGE_FILE.with_suffix(".idx.tmp")
+    with open(tmp, "wb") as f:
+        f.write(f"#{proof}\n".encode("utf-8"))
+        f.writelines(line + b"\n" for line in lines)
+    os.replace(tmp, COVERAGE_FILE)
+    return sum(line.endswith(b"\t+") for line in lines), len(lines)
+
+
+def lookup_coverage(proof: str, rel_path: str) -> Optional[bool]:
+    """
+    Deckt genau dieser Beweis die Datei ab? None, wenn kein Abgleich möglich
+    ist: --user-verified (kein Log, keine Test-IDs) oder kein Test erreicht
+    die Datei. Fehlt der Index zu einem Log-Beweis oder gehört er zu einem
+    anderen, gilt die Datei als nicht abgedeckt.
+    """
+    import mmap
+
+    from gate_fast import bisect_lines
+
+    if proof.startswith(USER_VERIFIED_PREFIX):
+        return None
+    try:
+        with open(COVERAGE_FILE, "rb") as f:
+            if f.readline().rstrip(b"\n") != f"#{proof}".encode("utf-8"):
+                return False
+            start = f.tell()
+            if start == os.fstat(f.fileno()).st_size:
+                return None  # kein Test erreicht irgendeine Datei
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                found = bisect_lines(buf, start, rel_path.encode("utf-8", errors="surrogateescape"))
+    except (OSError, ValueError):
+        return False
+    return None if found is None else found == b"+"
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("refresh", "show"):
+        print("Usage: test_map.py <refresh|show <pfad>>")
+        sys.exit(1)
+
+    scan = refresh()
+    if sys.argv[1] == "refresh":
+        test_count = sum(len(tests) for tests in scan["tests"].values())
+        print(f"✓ Test-Zuordnung: {test_count} Tests, {len(scan['types'])} Produktions-Dateien "
+              f"({scan['scanned']} neu gescannt)")
+        return
+
+    if len(sys.argv) < 3:
+        print("❌ show benötigt einen Pfad")
+        sys.exit(1)
+    rel_path = sys.argv[2]
+    if rel_path.startswith(str(PROJECT_DIR)):
+        rel_path = rel_path[len(str(PROJECT_DIR)):].lstrip("/")
+    tests = sorted(build_map(scan).get(rel_path, ()))
+    if not tests:
+        print(f"{rel_path}: kein Test benutzt einen Typ aus dieser Datei")
+        return
+    print(f"{rel_path}: {len(tests)} Tests")
+    for test_id in tests:
+        print(f"  {test_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Strukturierte Test-Reports als TDD-RED-Beweis.
+
+Statt Regex über freien Konsolen-Text werden Reports ausgewertet:
+  - JUnit XML (.xml, z.B. xcbeautify/xcpretty --report junit)
+  - JSON-Summary (.json) von `xcrun xcresulttool get test-results summary`,
+    wie sie Scripts/run-uitests.sh nach /tmp/xcuitest_summary.json schreibt
+
+JUnit wird mit iterparse gelesen; jedes <testcase> wird nach der Auswertung
+verworfen, auch Reports mit 100k Testfällen bleiben klein im Speicher.
+Assertion-Failures und Build-/Compile-Errors werden getrennt gezählt.
+"""
+
+import json
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from log_verify import COMPILE_ERROR_PATTERNS, normalize_test_id, open_log
+
+REPORT_SUFFIXES = (".xml", ".json")
+
+_COMPILE_ERROR_RE = re.compile("|".join(f"(?:{p})" for p in COMPILE_ERROR_PATTERNS), re.IGNORECASE)
+
+
+@dataclass
+class ReportSummary:
+    tests: int = 0
+    assertion_failures: int = 0
+    build_errors: int = 0
+    failing_tests: list[str] = field(default_factory=list)
+
+    def verdict(self) -> tuple[bool, str]:
+        """Gleiche Schlussfolgerung wie die Log-Regeln, aber gezählt statt geraten."""
+        if self.assertion_failures:
+            return True, f"Echte Test-Failures gefunden ({self.assertion_failures} von {self.tests} Tests)."
+
+        if self.build_errors:
+            return False, "Compile-Error ist KEIN echter TDD RED! Tests müssen kompilieren aber im Verhalten fehlschlagen."
+
+        return False, "Keine Test-Failures im Report gefunden. Tests müssen ausgeführt werden und fehlschlagen."
+
+
+def is_report(path: Path) -> bool:
+    return path.suffix.lower() in REPORT_SUFFIXES
+
+
+def _local(tag: str) -> str:
+    """Tag ohne XML-Namespace."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def summarize_junit(path: Path) -> ReportSummary:
+    summary = ReportSummary()
+    with open_log(path) as f:
+        # Pfad der offenen Elemente - fertige Testfälle werden aus ihrem
+        # Parent entfernt, der Baum wächst nie über eine Testsuite hinaus
+        stack = []
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            tag = _local(elem.tag)
+
+            if tag == "testcase":
+                summary.tests += 1
+                failed = False
+                for child in elem:
+                    child_tag = _local(child.tag)
+                    if child_tag not in ("failure", "error"):
+                        continue
+                    text = f"{child.get('message', '')} {child.text or ''}"
+                    if child_tag == "error" and _COMPILE_ERROR_RE.search(text):
+                        summary.build_errors += 1
+                    else:
+                        failed = True
+                if failed:
+                    summary.assertion_failures += 1
+                    summary.failing_tests.append(normalize_test_id(f"{elem.get('classname', '')}.{elem.get('name', '')}"))
+            elif tag in ("testsuite", "testsuites"):
+                # Build-Fehler ohne Testfälle stehen als <error> auf Suite-Ebene
+                for child in elem:
+                    if _local(child.tag) == "error":
+                        summary.build_errors += 1
+            else:
+                continue
+
+            if stack:
+                stack[-1].remove(elem)
+
+    return summary
+
+
+def summarize_json(path: Path) -> ReportSummary:
+    """
+    Liest eine xcresulttool-Summary. Sie enthält nur Zähler und die
+    fehlgeschlagenen Tests, bleibt also auch bei riesigen Suites klein.
+    """
+    with open_log(path) as f:
+        data = json.load(f)
+
+    summary = ReportSummary(tests=int(data.get("totalTestCount", 0)))
+    for failure in data.get("testFailures", []):
+        text = failure.get("failureText", "")
+        if _COMPILE_ERROR_RE.search(text):
+            summary.build_errors += 1
+            continue
+        summary.assertion_failures += 1
+        summary.failing_tests.append(normalize_test_id(failure.get("testIdentifierString") or failure.get("testName", "")))
+
+    # Build abgebrochen: kein einziger Test gelaufen, Ergebnis trotzdem "Failed"
+    if summary.tests == 0 and data.get("result") == "Failed":
+        summary.build_errors += 1
+    return summary
+
+
+def summarize_report(path: Path) -> ReportSummary:
+    """Raises ValueError, wenn der Report nicht lesbar ist."""
+    try:
+        if path.suffix.lower() == ".json":
+            return summarize_json(path)
+        return summarize_junit(path)
+    except ET.ParseError as e:
+        raise ValueError(str(e)) from e
+
+
+def verify_report(path: Path) -> tuple[bool, str]:
+    """
+    Prüft einen JUnit-/JSON-Report auf echte Test-Failures.
+
+    Returns: (is_valid, reason)
+    """
+    try:
+        summary = summarize_report(path)
+    except ValueError as e:
+        return False, f"Report nicht lesbar: {e}"
+    return summary.verdict()
@@ -10,17 +10,32 @@ Phasen:
   implementing  → Code wird geschrieben (EINZIGE Phase für Edit/Write!)
   validating    → Tests laufen, Validierung
 
+Welche Phase was erlaubt, steht als Regeltabelle in settings.json
+("workflowGate" → "policy", siehe gate_policy.py); eigene Pfad-Klassen
+(z.B. lockerere Regeln für Scripts/*.swift) unter "workflowGate" → "paths".
+
 Exit Codes:
   0 = Erlaubt
   2 = Blockiert (Tool wird nicht ausgeführt)
+
+Vorab-Prüfung mehrerer Dateien (Diff, JSON/JSONL-Payloads oder Pfadliste):
+  git diff | python3 workflow_gate.py --batch [--json]
+  python3 workflow_gate.py --batch payloads.jsonl
 """
 
+import functools
 import json
-import os
 import sys
-import re
-from datetime import datetime
+import time
+import zlib
 from pathlib import Path
+from typing import Optional
+
+import file_index
+import gate_policy
+import state_store
+import telemetry
+from gate_input import GATED_TOOLS, read_hook_target
 
 # Pfade relativ zum Projekt
 SCRIPT_DIR = Path(__file__).parent
@@ -46,48 +61,188 @@ PROTECTED_PATTERNS = [
     r".*\.xcodeproj/.*",      # Projekt-Dateien
 ]
 
+# Test-Dateien: geschützte Pfade in den Test-Targets des Xcode-Projekts
+TEST_PATTERNS = [
+    r"LeanHealthTimerTests/",
+    r"LeanHealthTimerUITests/",
+]
+
+SETTINGS_FILE = SCRIPT_DIR.parent / "settings.json"
 
-def load_state() -> dict:
-    """Lädt den aktuellen Workflow-State."""
-    if not STATE_FILE.exists():
-        return {"current_phase": "idle"}
+# Pfad-Klassen des Classifiers
+PATH_ALLOWED = "allowed"
+PATH_TEST = "test"
+PATH_PROTECTED = "protected"
+PATH_OTHER = "other"
 
+def load_state() -> dict:
+    """Lädt den aktuellen Workflow-State (lock-frei, Schreiber ersetzen atomar)."""
     try:
-        with open(STATE_FILE, "r") as f:
-            return json.load(f)
+        state = state_store.read(STATE_FILE)
     except (json.JSONDecodeError, IOError):
-        return {"current_phase": "idle"}
+        state = None
+    return state if state is not None else {"current_phase": "idle"}
 
 
-def is_always_allowed(file_path: str) -> bool:
-    """Prüft ob Datei immer erlaubt ist."""
-    rel_path = file_path
-    if file_path.startswith(str(PROJECT_DIR)):
-        rel_path = file_path[len(str(PROJECT_DIR)):].lstrip("/")
+def load_gate_settings() -> dict:
+    """Der "workflowGate"-Block aus settings.json (leer, wenn nicht lesbar)."""
+    try:
+        with open(SETTINGS_FILE, "r") as f:
+            settings = json.load(f).get("workflowGate", {})
+    except (json.JSONDecodeError, IOError, AttributeError):
+        return {}
+    return settings if isinstance(settings, dict) else {}
+
+
+def load_path_rules(configured: Optional[dict] = None) -> dict:
+    """
+    Lädt die Pfad-Regeln aus settings.json ("workflowGate" → "paths").
+    Fehlende Klassen fallen auf die eingebauten Listen zurück. Weitere
+    Schlüssel sind eigene Klassen (z.B. "scripts": ["Scripts/.*\\.swift$"]),
+    die vor "protected" geprüft werden und eigene Policy-Regeln bekommen.
+    """
+    rules = {
+        PATH_ALLOWED: ALWAYS_ALLOWED_PATTERNS,
+        PATH_TEST: TEST_PATTERNS,
+        PATH_PROTECTED: PROTECTED_PATTERNS,
+    }
+    if configured is None:
+        configured = load_gate_settings().get("paths", {})
+    if not isinstance(configured, dict):
+        return rules
+
+    for path_class in rules:
+        patterns = configured.get(path_class)
+        if isinstance(patterns, list):
+            rules[path_class] = patterns
+
+    for path_class, patterns in configured.items():
+        if path_class in rules or path_class == PATH_OTHER:
+            continue
+        if path_class.isidentifier() and isinstance(patterns, list):
+            rules[path_class] = patterns
+    return rules
+
+
+def load_policy(settings: dict) -> dict:
+    """Policy-Tabelle aus settings.json oder die eingebaute (= bisherige Logik)."""
+    policy = settings.get("policy")
+    if isinstance(policy, dict) and isinstance(policy.get("rules"), list):
+        return policy
+    return gate_policy.DEFAULT_POLICY
+
+
+def compile_classifier(rules: dict):
+    """
+    Kompiliert alle Regeln in EIN Pattern. Die Alternativen werden in
+    Prioritätsreihenfolge probiert: allowed → test → eigene Klassen →
+    protected; lastgroup liefert direkt die Pfad-Klasse.
+    """
+    def alternatives(patterns):
+        if not patterns:
+            return "(?!)"  # Leere Liste passt nie
+        return "|".join(f"(?:{p})" for p in patterns)
+
+    import re  # nur nötig, wenn der Datei-Index nicht reicht
+
+    protected = alternatives(rules[PATH_PROTECTED])
+    custom = "".join(
+        f"|(?P<{path_class}>{alternatives(patterns)})"
+        for path_class, patterns in rules.items()
+        if path_class not in (PATH_ALLOWED, PATH_TEST, PATH_PROTECTED)
+    )
+    return re.compile(
+        f"(?P<{PATH_ALLOWED}>{alternatives(rules[PATH_ALLOWED])})"
+        f"|(?P<{PATH_TEST}>(?={alternatives(rules[PATH_TEST])})(?:{protected}))"
+        f"{custom}"
+        f"|(?P<{PATH_PROTECTED}>{protected})"
+    )
+
+
+def _settings_key():
+    try:
+        st = SETTINGS_FILE.stat()
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
 
-    for pattern in ALWAYS_ALLOWED_PATTERNS:
-        if re.match(pattern, rel_path):
-            return True
-    return False
 
+def compile_rules() -> tuple:
+    """Liest settings.json einmal: Pfad-Regeln, Policy-Tabelle, eigene Meldungen."""
+    settings = load_gate_settings()
+    rules = load_path_rules(settings.get("paths", {}))
+    policy = gate_policy.compile_policy(load_policy(settings), list(rules) + [PATH_OTHER])
+    messages = settings.get("messages")
+    return rules, policy, messages if isinstance(messages, dict) else {}
 
-def requires_workflow(file_path: str) -> bool:
-    """Prüft ob Datei den Workflow erfordert."""
-    rel_path = file_path
+
+_rules, _policy, _messages = compile_rules()
+_classifier = None  # erst kompilieren, wenn der Datei-Index nicht reicht
+_classifier_key = _settings_key()
+
+
+def reload_path_rules(force: bool = False) -> None:
+    """Lädt Regeln und Policy neu, wenn sich settings.json geändert hat."""
+    global _rules, _classifier, _policy, _messages, _classifier_key
+    key = _settings_key()
+    if force or key != _classifier_key:
+        _rules, _policy, _messages = compile_rules()
+        _classifier = None
+        _classifier_key = key
+        rules_fingerprint.cache_clear()
+        classify.cache_clear()
+
+
+@functools.lru_cache(maxsize=1)
+def rules_fingerprint() -> str:
+    """Kennung der aktuellen Pfad-Regeln - ein Datei-Index gilt nur für genau diese."""
+    return f"{zlib.crc32(json.dumps(_rules, sort_keys=True).encode('utf-8')):08x}"
+
+
+def static_allow_classes() -> list[str]:
+    """Pfad-Klassen, die die Policy in keiner Phase blockiert (für gate_fast.py)."""
+    return sorted(_policy.static_allow)
+
+
+def relative_path(file_path: str) -> str:
     if file_path.startswith(str(PROJECT_DIR)):
-        rel_path = file_path[len(str(PROJECT_DIR)):].lstrip("/")
+        return file_path[len(str(PROJECT_DIR)):].lstrip("/")
+    return file_path
 
-    for pattern in PROTECTED_PATTERNS:
-        if re.match(pattern, rel_path):
-            return True
-    return False
 
+def match_path_class(rel_path: str) -> str:
+    """Pfad-Klasse allein aus den Regeln (ein Regex-Durchlauf)."""
+    global _classifier
+    if _classifier is None:
+        _classifier = compile_classifier(_rules)
+    match = _classifier.match(rel_path)
+    return match.lastgroup if match else PATH_OTHER
 
-def get_phase_error(phase: str, file_path: str) -> str:
-    """Generiert kontextabhängige Fehlermeldung."""
 
-    messages = {
-        "idle": f"""
+@functools.lru_cache(maxsize=1024)
+def classify(file_path: str) -> str:
+    """
+    Pfad-Klasse einer Datei: bekannte Dateien per Lookup im Datei-Index
+    (file_index.py), neue oder projektfremde Pfade über die Regeln.
+    """
+    rel_path = relative_path(file_path)
+    indexed = file_index.lookup(rel_path, rules_fingerprint())
+    return indexed if indexed is not None else match_path_class(rel_path)
+
+
+def is_always_allowed(file_path: str) -> bool:
+    """Prüft ob Datei immer erlaubt ist."""
+    return classify(file_path) == PATH_ALLOWED
+
+
+def requires_workflow(file_path: str) -> bool:
+    """Prüft ob Datei den Workflow erfordert (geschützte und eigene Klassen)."""
+    return classify(file_path) not in (PATH_ALLOWED, PATH_OTHER)
+
+
+# Banner je Phase - "{file}" wird erst beim Blockieren eingesetzt
+PHASE_BANNERS = {
+    "idle": """
 ╔══════════════════════════════════════════════════════════════════╗
 ║  ⛔ WORKFLOW GATE: Keine aktive Phase                            ║
 ╠══════════════════════════════════════════════════════════════════╣
@@ -98,11 +253,11 @@ def get_phase_error(phase: str, file_path: str) -> str:
 ║    • /bug [beschreibung]     → für Bug-Fixes                     ║
 ║    • /feature [name]         → für neue Features                 ║
 ║                                                                  ║
-║  Datei: {file_path[:50]}...
+║  Datei: {file}...
 ║                                                                  ║
 ╚══════════════════════════════════════════════════════════════════╝
 """,
-        "analysing": f"""
+    "analysing": """
 ╔══════════════════════════════════════════════════════════════════╗
 ║  ⛔ WORKFLOW GATE: Noch in Analyse-Phase                         ║
 ╠══════════════════════════════════════════════════════════════════╣
@@ -114,11 +269,11 @@ def get_phase_error(phase: str, file_path: str) -> str:
 ║    2. /spec schreiben oder Approval einholen                     ║
 ║    3. DANN erst /implement aufrufen                              ║
 ║                                                                  ║
-║  Datei: {file_path[:50]}...
+║  Datei: {file}...
 ║                                                                  ║
 ╚══════════════════════════════════════════════════════════════════╝
 """,
-        "spec_written": f"""
+    "spec_written": """
 ╔══════════════════════════════════════════════════════════════════╗
 ║  ⛔ WORKFLOW GATE: Spec noch nicht freigegeben                   ║
 ╠══════════════════════════════════════════════════════════════════╣
@@ -129,11 +284,11 @@ def get_phase_error(phase: str, file_path: str) -> str:
 ║    → User muss "Approved" oder "Freigegeben" sagen               ║
 ║    → DANN erst /implement aufrufen                               ║
 ║                                                                  ║
-║  Datei: {file_path[:50]}...
+║  Datei: {file}...
 ║                                                                  ║
 ╚══════════════════════════════════════════════════════════════════╝
 """,
-        "spec_approved": f"""
+    "spec_approved": """
 ╔══════════════════════════════════════════════════════════════════╗
 ║  ⛔ WORKFLOW GATE: /implement noch nicht aufgerufen              ║
 ╠══════════════════════════════════════════════════════════════════╣
@@ -144,11 +299,11 @@ def get_phase_error(phase: str, file_path: str) -> str:
 ║  NÄCHSTER SCHRITT:                                               ║
 ║    → /implement aufrufen um Code-Änderungen zu erlauben          ║
 ║                                                                  ║
-║  Datei: {file_path[:50]}...
+║  Datei: {file}...
 ║                                                                  ║
 ╚══════════════════════════════════════════════════════════════════╝
 """,
-        "validating": f"""
+    "validating": """
 ╔══════════════════════════════════════════════════════════════════╗
 ║  ⛔ WORKFLOW GATE: In Validierungs-Phase                         ║
 ╠══════════════════════════════════════════════════════════════════╣
@@ -158,13 +313,37 @@ def get_phase_error(phase: str, file_path: str) -> str:
 ║  Wenn Fixes nötig sind:                                          ║
 ║    → /implement erneut aufrufen                                  ║
 ║                                                                  ║
-║  Datei: {file_path[:50]}...
+║  Datei: {file}...
 ║                                                                  ║
 ╚══════════════════════════════════════════════════════════════════╝
 """,
-    }
+}
+
 
-    return messages.get(phase, f"Phase '{phase}' erlaubt keine Code-Änderungen.")
+def get_phase_error(phase: str, file_path: str) -> str:
+    """Generiert kontextabhängige Fehlermeldung (nur das eine benötigte Banner)."""
+    banner = PHASE_BANNERS.get(phase)
+    if banner is None:
+        return f"Phase '{phase}' erlaubt keine Code-Änderungen."
+    return banner.replace("{file}", file_path[:50])
+
+
+def render_message(message_id: Optional[str], phase: str, file_path: str) -> str:
+    """Rendert die Meldung einer Policy-Regel erst, wenn wirklich blockiert wird."""
+    if message_id == "phase":
+        return get_phase_error(phase, file_path)
+    if message_id == "tdd_missing":
+        return get_tdd_error(file_path, "Tests noch nicht geschrieben")
+    if message_id == "tdd_no_proof":
+        # tests_written=True aber KEIN Beweis → Fake TDD!
+        return get_tdd_error(file_path, "Kein TDD-Beweis vorhanden (--proof oder --user-verified fehlt)")
+    if message_id == "tdd_not_covered":
+        # RED-Beweis stammt von Tests, die diese Datei gar nicht benutzen
+        return get_tdd_error(file_path, "RED-Tests decken diese Datei nicht ab")
+    template = _messages.get(message_id)
+    if template is None:
+        return f"⛔ WORKFLOW GATE: blockiert durch Policy-Regel '{message_id}' (Phase '{phase}')\n  Datei: {file_path}"
+    return template.replace("{file}", file_path).replace("{phase}", phase)
 
 
 def get_tdd_error(file_path: str, reason: str = "keine Tests") -> str:
@@ -194,72 +373,249 @@ def get_tdd_error(file_path: str, reason: str = "keine Tests") -> str:
 """
 
 
-def main():
-    """Hauptlogik des Workflow Gates."""
+def tests_cover(state: dict, file_path: str) -> bool:
+    """Decken die beim RED fehlgeschlagenen Tests die Datei ab? (siehe test_map.py)"""
+    import test_map
 
-    # Input von Claude Code lesen (JSON auf stdin)
-    try:
-        input_data = json.loads(sys.stdin.read())
-    except json.JSONDecodeError:
-        # Kein gültiger Input - erlauben (Fallback)
-        sys.exit(0)
+    covered = test_map.lookup_coverage(state.get("tdd_proof") or "", relative_path(file_path))
+    return covered is not False  # None: --user-verified bzw. Datei ohne Tests
 
-    # Tool und Parameter extrahieren
-    tool_name = input_data.get("tool_name", "")
-    tool_input = input_data.get("tool_input", {})
 
+def decide(tool_name: str, file_path: str, get_state=load_state) -> tuple[int, str]:
+    """
+    Entscheidet über einen Hook-Aufruf ohne Seiteneffekte.
+
+    Returns: (exit_code, stderr_meldung)
+    """
     # Nur Edit und Write prüfen
     if tool_name not in ["Edit", "Write"]:
-        sys.exit(0)
+        return 0, ""
 
-    # Dateipfad extrahieren
-    file_path = tool_input.get("file_path", "")
     if not file_path:
-        sys.exit(0)
+        return 0, ""
 
-    # Immer erlaubte Dateien durchlassen
-    if is_always_allowed(file_path):
-        sys.exit(0)
+    # Policy-Tabelle: erlaubte Klassen ohne State, sonst ein Dict-Lookup
+    path_class = classify(file_path)
+    verdict, message_id, phase = _policy.evaluate(
+        path_class, get_state, lambda state: tests_cover(state, file_path)
+    )
+    if verdict == gate_policy.ALLOW:
+        return 0, ""
+    return 2, render_message(message_id, phase, file_path)
 
-    # Prüfen ob Datei Workflow erfordert
-    if not requires_workflow(file_path):
-        sys.exit(0)
 
-    # State laden und Phase prüfen
-    state = load_state()
-    current_phase = state.get("current_phase", "idle")
+def check(input_data: dict, get_state=load_state) -> tuple[int, str]:
+    """Entscheidet über bereits geparsten Hook-Input."""
+    tool_input = input_data.get("tool_input", {})
+    if not isinstance(tool_input, dict):
+        tool_input = {}
+    return decide(input_data.get("tool_name", ""), tool_input.get("file_path", ""), get_state)
+
 
-    # NUR in "implementing" Phase sind Code-Änderungen erlaubt!
-    if current_phase == "implementing":
-        # Unterscheide zwischen Test-Dateien und Produktion-Code
-        is_test_file = "Tests/" in file_path or "Test" in file_path
+def run(raw_input: str, get_state=load_state) -> tuple[int, str]:
+    """Wertet rohen Hook-Input (JSON-Text) aus."""
+    try:
+        input_data = json.loads(raw_input)
+    except json.JSONDecodeError:
+        # Kein gültiger Input - erlauben (Fallback)
+        return 0, ""
+    if not isinstance(input_data, dict):
+        return 0, ""
+    return check(input_data, get_state)
+
+
+def decide_batch(targets, get_state=load_state) -> list[tuple[str, int, str]]:
+    """
+    Entscheidet über viele (tool_name, file_path) auf einmal, z.B. um eine
+    Änderung über mehrere Targets vorab zu prüfen. Der State wird höchstens
+    einmal geladen, jeder Pfad nur einmal klassifiziert.
+
+    Returns: [(file_path, exit_code, stderr_meldung)] in Eingabereihenfolge
+    """
+    loaded = []
+
+    def state_once() -> dict:
+        if not loaded:
+            loaded.append(get_state())
+        return loaded[0]
+
+    verdicts = {}
+    for tool_name, file_path in targets:
+        key = (tool_name, file_path)
+        if key not in verdicts:
+            verdicts[key] = (file_path, *decide(tool_name, file_path, state_once))
+    return list(verdicts.values())
+
+
+def _diff_path(spec: str) -> str:
+    """Pfad aus einer "--- a/x" / "+++ b/x"-Zeile, "" für /dev/null."""
+    spec = spec.split("\t", 1)[0].strip().strip('"')
+    if spec == "/dev/null":
+        return ""
+    if spec[:2] in ("a/", "b/"):
+        spec = spec[2:]
+    return str(PROJECT_DIR / spec)
+
+
+def parse_batch_input(text: str) -> list[tuple[str, str]]:
+    """
+    Akzeptiert einen Unified Diff, ein JSON-Array von Hook-Payloads (oder
+    Pfaden) oder JSONL bzw. einen Pfad pro Zeile.
+
+    Returns: [(tool_name, file_path)]
+    """
+    lines = text.splitlines()
+    if any(line.startswith(("diff --git ", "+++ ")) for line in lines):
+        import re
+
+        hunk_header = re.compile(r"@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+        targets = []
+        old_path = ""
+        old_left = new_left = 0  # noch ausstehende Zeilen des aktuellen Hunks
+        for line in lines:
+            if old_left > 0 or new_left > 0:
+                # Hunk-Inhalt - auch "--- x"/"+++ x" sind hier geänderte Zeilen
+                if line.startswith("-"):
+                    old_left -= 1
+                elif line.startswith("+"):
+                    new_left -= 1
+                elif not line.startswith("\\"):  # "\ No newline at end of file"
+                    old_left -= 1
+                    new_left -= 1
+                continue
+            if line.startswith("diff --git "):
+                old_path = ""
+            elif line.startswith("@@"):
+                match = hunk_header.match(line)
+                if match:
+                    old_left = int(match[1] if match[1] is not None else 1)
+                    new_left = int(match[2] if match[2] is not None else 1)
+            elif line.startswith("--- "):
+                old_path = _diff_path(line[4:])
+            elif line.startswith("+++ "):
+                # Gelöschte Dateien: +++ /dev/null → alten Pfad prüfen
+                path = _diff_path(line[4:]) or old_path
+                if path:
+                    targets.append(("Edit", path))
+        return targets
+
+    if text.lstrip().startswith("["):
+        items = json.loads(text)
+    else:
+        items = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            items.append(json.loads(line) if line.startswith("{") else line)
+
+    targets = []
+    for item in items:
+        if isinstance(item, str):
+            targets.append(("Edit", item))
+        elif isinstance(item, dict):
+            tool_input = item.get("tool_input", {})
+            if not isinstance(tool_input, dict):
+                tool_input = {}
+            targets.append((item.get("tool_name", ""), tool_input.get("file_path", "")))
+    return targets
+
+
+def _headline(message: str) -> str:
+    """Titelzeile eines Banners (erste Zeile mit Text zwischen ║)."""
+    for line in message.splitlines():
+        text = line.strip("║ ")
+        if text and not text.startswith(("╔", "╠", "╚")):
+            return text
+    return ""
+
+
+def batch_main(args: list[str]) -> None:
+    """
+    Aufruf: workflow_gate.py --batch [<datei>|-] [--json]
+
+    Exit Code 2, sobald eine Datei blockiert würde.
+    """
+    sources = [arg for arg in args if arg != "--json"]
+    if sources and sources[0] != "-":
+        text = Path(sources[0]).read_text()
+    else:
+        text = sys.stdin.read()
 
-        if is_test_file:
-            # Test-Dateien immer erlauben (das ist ja der RED-Schritt)
-            sys.exit(0)
+    try:
+        targets = parse_batch_input(text)
+    except json.JSONDecodeError as e:
+        print(f"❌ Ungültige Batch-Eingabe: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    verdicts = decide_batch(targets)
+    if "--json" in args:
+        print(json.dumps([
+            {
+                "file_path": path,
+                "exit_code": code,
+                "verdict": "block" if code else "allow",
+                "headline": _headline(message),
+                "reason": message.strip(),
+            }
+            for path, code, message in verdicts
+        ], ensure_ascii=False, indent=2))
+    else:
+        for path, code, message in verdicts:
+            if code:
+                print(f"⛔ {path}  - {_headline(message)}")
+            else:
+                print(f"✓ {path}")
+
+    sys.exit(max((code for _, code, _ in verdicts), default=0))
 
-        # ZUSÄTZLICH: TDD-Check mit BEWEIS!
-        tests_written = state.get("tests_written", False)
-        tdd_proof = state.get("tdd_proof", None)
 
-        if not tests_written:
-            error_msg = get_tdd_error(file_path, "Tests noch nicht geschrieben")
-            print(error_msg, file=sys.stderr)
-            sys.exit(2)
+def main():
+    """Hauptlogik des Workflow Gates."""
+    if sys.argv[1:2] == ["--batch"]:
+        batch_main(sys.argv[2:])
 
-        if not tdd_proof:
-            # tests_written=True aber KEIN Beweis → Fake TDD!
-            error_msg = get_tdd_error(file_path, "Kein TDD-Beweis vorhanden (--proof oder --user-verified fehlt)")
-            print(error_msg, file=sys.stderr)
-            sys.exit(2)
+    # Telemetrie: CPU-Zeit bis hier ≈ Interpreter-Start + Imports
+    timings = {"startup": time.process_time()}
+    started = time.perf_counter()
 
-        # Echter TDD-Beweis vorhanden → Code-Änderungen erlaubt
+    # Input von Claude Code lesen (JSON auf stdin) - nur bis file_path,
+    # der content eines Write wird nie komplett eingelesen
+    try:
+        tool_name, file_path = read_hook_target(sys.stdin)
+    except ValueError:
+        # Kein gültiger Input - erlauben (Fallback)
+        timings["total"] = timings["startup"] + time.perf_counter() - started
+        telemetry.record("gate", "error", timings)
         sys.exit(0)
-
-    # Alle anderen Phasen: BLOCKIEREN
-    error_msg = get_phase_error(current_phase, file_path)
-    print(error_msg, file=sys.stderr)
-    sys.exit(2)
+    parsed = time.perf_counter()
+
+    if tool_name in GATED_TOOLS and file_path:
+        classify(file_path)  # Ergebnis landet im Cache, decide() fragt nur noch ab
+    classified = time.perf_counter()
+
+    state_seconds = []
+
+    def timed_state() -> dict:
+        begin = time.perf_counter()
+        state = load_state()
+        state_seconds.append(time.perf_counter() - begin)
+        return state
+
+    exit_code, error_msg = decide(tool_name, file_path, timed_state)
+    decided = time.perf_counter()
+    if error_msg:
+        print(error_msg, file=sys.stderr)
+
+    timings.update(
+        parse=parsed - started,
+        classify=classified - parsed,
+        state=sum(state_seconds),
+        decide=decided - classified - sum(state_seconds),
+        total=timings["startup"] + decided - started,
+    )
+    telemetry.record("gate", "block" if exit_code else "allow", timings)
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
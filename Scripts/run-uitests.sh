@@ -18,6 +18,8 @@ PROJECT="Meditationstimer.xcodeproj"
 SCHEME="Lean Health Timer"
 UITEST_TARGET="LeanHealthTimerUITests"
 DERIVED_DATA="$HOME/Library/Developer/Xcode/DerivedData"
+RESULT_BUNDLE="/tmp/xcuitest_result.xcresult"
+SUMMARY_JSON="/tmp/xcuitest_summary.json"
 
 # ============================================
 # FUNKTIONEN
@@ -57,17 +59,27 @@ run_tests() {
     echo "═══════════════════════════════════════════════════════════════════════"
     echo ""
 
+    # Result Bundle muss vor jedem Lauf neu angelegt werden
+    rm -rf "$RESULT_BUNDLE" "$SUMMARY_JSON"
+
     # Tests mit Retry ausführen
     xcodebuild test \
       -project "$PROJECT" \
       -scheme "$SCHEME" \
       -destination "platform=iOS Simulator,id=$SIMULATOR_ID" \
+      -resultBundlePath "$RESULT_BUNDLE" \
       -retry-tests-on-failure \
       -test-iterations 3 \
       $test_filter \
       2>&1 | tee /tmp/xcuitest_output.log | grep -E "(Test Case|passed|failed|error:|TEST SUCCEEDED|TEST FAILED|Code=64)"
+    local exit_code=${PIPESTATUS[0]}
+
+    # Strukturierte Summary für den TDD-Beweis (update_state.py tests_written --proof)
+    if [ -d "$RESULT_BUNDLE" ]; then
+        xcrun xcresulttool get test-results summary --path "$RESULT_BUNDLE" > "$SUMMARY_JSON" 2>/dev/null || rm -f "$SUMMARY_JSON"
+    fi
 
-    return ${PIPESTATUS[0]}
+    return $exit_code
 }
 
 clean_derived_data() {
@@ -164,6 +176,10 @@ else
     echo "Fehlgeschlagene Tests:"
     grep "failed" /tmp/xcuitest_output.log 2>/dev/null || echo "  (keine Details verfügbar)"
     echo ""
+    if [ -f "$SUMMARY_JSON" ]; then
+        echo "TDD-Beweis (RED): python3 .claude/hooks/update_state.py tests_written --proof $SUMMARY_JSON"
+        echo ""
+    fi
 
     # Hinweis bei Exit Code 64 nach beiden Versuchen
     if grep -q "Code=64" /tmp/xcuitest_output.log 2>/dev/null; then